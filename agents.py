@@ -0,0 +1,539 @@
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from functools import partial
+
+from phi.agent import Agent
+from phi.run.response import RunResponse
+from phi.model.google import Gemini
+
+from pipeline import AGENT_FINISHED, DONE, PIPELINE_MODE, Member, drain, stream_fanout, stream_team
+from ratelimit import acquire, call, call_stream, set_session
+from report_cache import SECTION_TTLS, get_cache, normalize_company, prompt_hash, section_ttl
+from tickers import compare_quotes
+from transcripts import CHUNK_CHARS, VideoResearcher
+
+# Agent factory shared by the Streamlit tabs. Every agent gets brand new Agent,
+# model and toolkit objects, so no conversation state leaks between sessions,
+# and no API key outlives the run that used it. The tool
+# libraries (yfinance, newspaper, DuckDuckGo, YouTube) are imported when the
+# first toolkit is built, not with this module.
+
+MODEL_ID = "gemini-2.0-flash-exp"
+
+# Agent prompts (hashed into the report cache key, so edits invalidate old reports)
+WEB_AGENT_INSTRUCTIONS = [" This includes the company's specialization, core values, mission statement, recent achievements, Rivals and Competitors organizational structure, customer service approach, work culture, main products/services, key personnel, and growth strategy. Always include the sources."]
+
+FINANCE_AGENT_INSTRUCTIONS = ["Use tables to display data"]
+
+RESEARCH_AGENT_DESCRIPTION = "You are a senior researcher writing an article on a topic."
+RESEARCH_AGENT_INSTRUCTIONS = [
+    "For a given company, search for the top links in biggest challenges facing the company, its strategic initiatives, and growth patterns. Prioritize reliable and reputable sources .",
+    "Then read each URL and extract the article text, if a URL isn't available, ignore it.",
+    "Analyse and prepare an NYT worthy article based on the information.",
+]
+
+BASIC_TEAM_INSTRUCTIONS = [
+    "You are a placement support agent designed to gather comprehensive information about a company given only the company's name.",
+    "Your goal is to provide a thorough overview that would be useful for a student preparing for a placement drive.",
+    "Initiate a broad and systematic information gathering process using the available agents.",
+    "Follow this structure to collect information:",
+    "   1. **Web Search Agent:** First, use the web search agent to identify and collect general company information. This includes the company's specialization, core values, mission statement, recent achievements, organizational structure, customer service approach, work culture, main products/services, key personnel, and growth strategy. Always include the sources.",
+    "   2. **Finance Agent:** Then, use the finance agent to gather all relevant financial data. This includes the latest stock price, analyst recommendations, and other key financial metrics. Present this data in a well-formatted table. Do not perform this if no financial data is available.",
+    "   3. **Research Agent:** Concurrently, use the research agent to look for in-depth analysis, articles, and reports. Always include the source links.",
+    "Be as detailed as possible in your report. Use Markdown for formatting. Use tables when presenting data. Include links to the sources when available.",
+    "Make all the outputs as Single article Do not Provide Duplicate Information",
+]
+
+YT_AGENT_ROLE = "A video content researcher specialized in company-related videos on YouTube."
+YT_AGENT_DESCRIPTION = "You are responsible for finding and summarizing relevant video content about a company on YouTube. This includes company presentations, interviews with key personnel, product demos, and employee testimonials. Use the YouTube search tool to perform the search and to extract the relevant content from the top videos found. Focus on providing a concise and informative summary of each video found and always include the link of the videos."
+YT_AGENT_INSTRUCTIONS = [
+    "Your primary role is to search YouTube for video content relevant to a given company.",
+    "Use the provided DuckDuckGo to find videos such as company presentations, CEO interviews, product demos, employee testimonials, or other relevant content.",
+    "When a relevant URL found use YoutubeTools, watch and explain the video in detail, focusing on the key topics and information presented.",
+    "Provide summaries of each video, highlighting the most important points that could be valuable for a student preparing for a placement drive.",
+    "Always provide the direct YouTube link to the videos you summarize.",
+    "Focus on videos from the official company channels or those with credible sources.",
+    "Write the summaries as an article and mention link at end as sources"
+    "Do not search for music videos or other non-relevant content.",
+    "Provide a brief summary of the video and the link. Use bullet points for multiple videos.",
+]
+
+# Summarizes one transcript chunk (or merges chunk summaries) for the videos section
+VIDEO_SUMMARY_INSTRUCTIONS = [
+    "You summarize YouTube videos about a company for a student preparing for a placement drive.",
+    "You are given a video title and part of its transcript, or partial summaries of the same video to combine.",
+    "Write a concise summary in Markdown bullet points focusing on the company's products, culture, values, leadership, hiring and growth plans.",
+    "Only use information from the given text. Do not add an introduction or a title.",
+]
+
+PRO_TEAM_INSTRUCTIONS = [
+    "You are a placement support agent designed to gather comprehensive information about a company given only the company's name.",
+    "Your goal is to provide a thorough and insightful overview that would be extremely useful for a student preparing for a placement drive.",
+    "Initiate a broad and systematic information gathering process using the available agents, ensuring that there is no duplication of information.",
+    "Follow this structure to collect information, and always ensure no duplicate info is provided:",
+    "   1. **Web Search Agent:** First, use the web search agent to identify and collect general company information. This includes the company's specialization, core values, mission statement, recent achievements, organizational structure, customer service approach, work culture, main products/services, key personnel, and growth strategy. Always include the source URLs.",
+    "   2. **Finance Agent:** Then, use the finance agent to gather all relevant financial data. This includes the latest stock price, analyst recommendations, and other key financial metrics. Present this data in a well-formatted table. If no financial data is available, do not use this agent.",
+    "   3. **Research Agent:** Concurrently, use the research agent to look for in-depth analysis, articles, and reports. Focus on identifying the biggest challenges facing the company, its strategic initiatives, and growth patterns. Always include the source links.",
+    "   4. **YouTube Agent:** Finally, use the YouTube agent to search for relevant videos about the company, such as company presentations, CEO interviews, product demos, and employee testimonials. Summarize every relevant video and always include the sources.",
+    "Compile all the information gathered from all the agents into a single, detailed report, ensuring that there is no duplication of data. Structure it without differentiating agents",
+    "Be as detailed as possible in your report. Use Markdown for formatting. Use tables when presenting data. Include links to the sources when available.",
+    "Make all the outputs as Single article Do not Provide Duplicate Information. Ensure all sections are present even if there is no information available for some of them. If no information available mark as NA.",
+]
+
+STOCK_AGENT_DESCRIPTION = "You need to get the live stock price of the provided company."
+STOCK_AGENT_INSTRUCTIONS = [
+    "Find the stock symbol of the company using DuckDuckGo search.",
+    "Use YFinanceTools to get the live stock price of the company."
+]
+
+# Tasks handed to each member when they run in parallel (fan-out mode)
+WEB_AGENT_TASK = "Identify and collect general company information about {company}. This includes the company's specialization, core values, mission statement, recent achievements, rivals and competitors, organizational structure, customer service approach, work culture, main products/services, key personnel, and growth strategy. Always include the source URLs."
+FINANCE_AGENT_TASK = "Gather all relevant financial data for {company}. This includes the latest stock price, analyst recommendations, and other key financial metrics. Present this data in a well-formatted table. If the company is not publicly listed or no financial data is available, say so briefly."
+RESEARCH_AGENT_TASK = "Look for in-depth analysis, articles, and reports about {company}. Focus on identifying the biggest challenges facing the company, its strategic initiatives, and growth patterns. Always include the source links."
+
+BASIC_SYNTHESIS_INSTRUCTIONS = [
+    "You are a placement support agent preparing a company overview for a student preparing for a placement drive.",
+    "You are given the findings of a Web Agent (general company information), a Finance Agent (financial data) and a Research Agent (in-depth analysis and articles).",
+    "Compile the findings into a single article. Structure it by topic without differentiating agents and do not provide duplicate information.",
+    "Be as detailed as possible in your report. Use Markdown for formatting. Use tables when presenting data. Include links to the sources when available.",
+    "Only use information present in the findings. If a finding is marked NA, leave that part out.",
+]
+
+PRO_SYNTHESIS_INSTRUCTIONS = [
+    "You are a placement support agent preparing a thorough and insightful company overview for a student preparing for a placement drive.",
+    "You are given the findings of a Web Agent (general company information), a Finance Agent (financial data), a Research Agent (in-depth analysis, challenges, strategic initiatives and growth patterns) and a YouTube Agent (summaries of company videos).",
+    "Keep a section on the company's videos with each video's link and the points most useful for a placement candidate.",
+    "Compile all the findings into a single, detailed report, ensuring that there is no duplication of data. Structure it without differentiating agents.",
+    "Be as detailed as possible in your report. Use Markdown for formatting. Use tables when presenting data. Include links to the sources when available.",
+    "Ensure all sections are present even if there is no information available for some of them. If no information available mark as NA.",
+]
+
+COMPARE_SYNTHESIS_INSTRUCTIONS = [
+    "You are a placement support agent helping a student choose between several companies visiting for a placement drive.",
+    "You are given, for each company, the findings of a Web Agent (general company information) and a Research Agent (in-depth analysis, challenges, strategic initiatives and growth patterns), plus a market data table covering all of them.",
+    "Write a single side-by-side comparison report. Start with a summary table comparing the companies on specialization, main products/services, work culture, growth strategy and key challenges.",
+    "Include the market data table as the comparative financial table, then add a short comparison of the companies' financial position.",
+    "Follow with a short section per company highlighting what sets it apart, and end with guidance on which kind of candidate each company suits best.",
+    "Use Markdown for formatting. Include links to the sources when available. If no information is available for something mark it as NA.",
+]
+
+TIER_TEAM_INSTRUCTIONS = {"basic": BASIC_TEAM_INSTRUCTIONS, "pro": PRO_TEAM_INSTRUCTIONS}
+TIER_SYNTHESIS_INSTRUCTIONS = {"basic": BASIC_SYNTHESIS_INSTRUCTIONS, "pro": PRO_SYNTHESIS_INSTRUCTIONS}
+
+MEMBER_PROMPTS = (WEB_AGENT_INSTRUCTIONS, FINANCE_AGENT_INSTRUCTIONS, RESEARCH_AGENT_DESCRIPTION, RESEARCH_AGENT_INSTRUCTIONS, WEB_AGENT_TASK, FINANCE_AGENT_TASK, RESEARCH_AGENT_TASK)
+PROMPT_VERSIONS = {
+    "basic": prompt_hash(PIPELINE_MODE, *MEMBER_PROMPTS, BASIC_TEAM_INSTRUCTIONS, BASIC_SYNTHESIS_INSTRUCTIONS),
+    "pro": prompt_hash(PIPELINE_MODE, *MEMBER_PROMPTS, YT_AGENT_ROLE, YT_AGENT_DESCRIPTION, YT_AGENT_INSTRUCTIONS, VIDEO_SUMMARY_INSTRUCTIONS, PRO_TEAM_INSTRUCTIONS, PRO_SYNTHESIS_INSTRUCTIONS),
+    "stock": prompt_hash(STOCK_AGENT_DESCRIPTION, STOCK_AGENT_INSTRUCTIONS),
+    "compare": prompt_hash(*MEMBER_PROMPTS, COMPARE_SYNTHESIS_INSTRUCTIONS),
+}
+VIDEO_SUMMARY_VERSION = prompt_hash(MODEL_ID, VIDEO_SUMMARY_INSTRUCTIONS, CHUNK_CHARS)
+
+_client_hook = None
+_tool_hook = None
+
+
+# Rate-limit provider behind each toolkit. Search, articles and YouTube are not
+# listed: the fetch layer throttles them itself, and only on cache misses.
+TOOLKIT_PROVIDERS = {
+    "finance": "yfinance",
+    "stock_price": "yfinance",
+}
+
+
+class ScheduledGemini(Gemini):
+    """Gemini whose requests go through the per-key scheduler, with retries on quota errors."""
+
+    # The research run this model belongs to, for fair queueing between runs.
+    # Not session_id: Agent.update_model() overwrites that with the agent's own id.
+    scheduler_session: str = None
+
+    def get_client(self):
+        return _client_hook(self) if _client_hook else super().get_client()
+
+    def invoke(self, messages):
+        # Tool calls that follow run on this thread, so they inherit the session
+        set_session(self.scheduler_session)
+        return call("gemini", lambda: super(ScheduledGemini, self).invoke(messages), key=self.api_key, session=self.scheduler_session)
+
+    def invoke_stream(self, messages):
+        set_session(self.scheduler_session)
+        return call_stream("gemini", lambda: super(ScheduledGemini, self).invoke_stream(messages), key=self.api_key, session=self.scheduler_session)
+
+
+def set_client_hook(hook):
+    """Send every model request to hook(model)'s client instead of Gemini's (None restores it).
+
+    Used by benchmark.py to record and replay model responses.
+    """
+    global _client_hook
+    _client_hook = hook
+
+
+def set_tool_hook(hook):
+    """Replace every new tool function's entrypoint with hook(function) (None restores it).
+
+    Used by benchmark.py to record and replay tool results.
+    """
+    global _tool_hook
+    _tool_hook = hook
+
+
+def new_toolkit(name):
+    """A new toolkit for one agent.
+
+    phi wraps each function's entrypoint and stores the agent on it when the agent
+    registers the toolkit, so toolkits cannot be shared between agents. The state
+    worth sharing (HTTP pool, fetch cache, rate limits) lives in fetch.py and ratelimit.py.
+    """
+    from phi.tools.yfinance import YFinanceTools
+
+    from fetch import SharedDuckDuckGo, SharedNewspaper4k, SharedYouTubeTools
+
+    if name == "search":
+        toolkit = SharedDuckDuckGo()
+    elif name == "finance":
+        toolkit = YFinanceTools(stock_price=True, analyst_recommendations=True, company_info=True)
+    elif name == "stock_price":
+        toolkit = YFinanceTools(stock_price=True)
+    elif name == "articles":
+        toolkit = SharedNewspaper4k()
+    elif name == "youtube":
+        toolkit = SharedYouTubeTools()
+    else:
+        raise ValueError(f"Unknown toolkit: {name}")
+    provider = TOOLKIT_PROVIDERS.get(name)
+    for function in toolkit.functions.values():
+        if provider:
+            function.pre_hook = partial(acquire, provider)
+        if _tool_hook:
+            function.entrypoint = _tool_hook(function)
+    return toolkit
+
+
+def get_model(api_key):
+    # Agents register their tools on the model, so each one needs its own
+    return ScheduledGemini(id=MODEL_ID, api_key=api_key)
+
+
+def build_web_agent(api_key):
+    return Agent(
+        name="Web Agent",
+        model=get_model(api_key),
+        tools=[new_toolkit("search")],
+        instructions=WEB_AGENT_INSTRUCTIONS,
+        show_tool_calls=True,
+        markdown=True,
+        debug_mode=True,
+        prevent_hallucinations=True
+    )
+
+
+def build_finance_agent(api_key):
+    return Agent(
+        name="Finance Agent",
+        model=get_model(api_key),
+        tools=[new_toolkit("finance")],
+        instructions=FINANCE_AGENT_INSTRUCTIONS,
+        show_tool_calls=True,
+        markdown=True,
+        debug_mode=True,
+        prevent_hallucinations=True
+    )
+
+
+def build_research_agent(api_key):
+    return Agent(
+        name="Research Agent",
+        model=get_model(api_key),
+        tools=[new_toolkit("search"), new_toolkit("articles")],
+        description=RESEARCH_AGENT_DESCRIPTION,
+        instructions=RESEARCH_AGENT_INSTRUCTIONS,
+        markdown=True,
+        show_tool_calls=True,
+        add_datetime_to_instructions=True,
+        debug_mode=True,
+        prevent_hallucinations=True
+    )
+
+
+def build_youtube_agent(api_key):
+    return Agent(
+        name="YouTube Agent",
+        role=YT_AGENT_ROLE,
+        model=get_model(api_key),
+        tools=[new_toolkit("search"), new_toolkit("youtube")],
+        description=YT_AGENT_DESCRIPTION,
+        instructions=YT_AGENT_INSTRUCTIONS,
+        markdown=True,
+        show_tool_calls=True,
+        add_datetime_to_instructions=True,
+        debug_mode=True,
+        prevent_hallucinations=True,
+    )
+
+
+def build_video_summarizer(api_key):
+    return Agent(
+        name="Video Summarizer",
+        model=get_model(api_key),
+        instructions=VIDEO_SUMMARY_INSTRUCTIONS,
+        markdown=True,
+    )
+
+
+def build_video_researcher(api_key):
+    return VideoResearcher(partial(build_video_summarizer, api_key), VIDEO_SUMMARY_VERSION)
+
+
+def build_synthesis_agent(api_key, tier):
+    return Agent(
+        name="Synthesis Agent",
+        model=get_model(api_key),
+        instructions=TIER_SYNTHESIS_INSTRUCTIONS[tier],
+        markdown=True,
+        debug_mode=True,
+        prevent_hallucinations=True
+    )
+
+
+def build_compare_agent(api_key):
+    return Agent(
+        name="Comparison",
+        model=get_model(api_key),
+        instructions=COMPARE_SYNTHESIS_INSTRUCTIONS,
+        markdown=True,
+        debug_mode=True,
+    )
+
+
+def build_team_leader(api_key, tier, members):
+    return Agent(
+        team=[m.agent for m in members],
+        model=get_model(api_key),
+        instructions=TIER_TEAM_INSTRUCTIONS[tier],
+        show_tool_calls=True,
+        markdown=True,
+        debug_mode=True,
+        prevent_hallucinations=True
+    )
+
+
+def build_stock_agent(api_key):
+    return Agent(
+        name="Stock Agent",
+        model=get_model(api_key),
+        tools=[new_toolkit("search"), new_toolkit("stock_price")],
+        description=STOCK_AGENT_DESCRIPTION,
+        instructions=STOCK_AGENT_INSTRUCTIONS,
+        debug_mode=True,
+        show_tool_calls=True,
+    )
+
+
+# Report sections. Each is produced by one member agent and cached on its own,
+# shared by both tiers and versioned by that member's prompts, so a repeat
+# request only reruns the members whose section has gone stale.
+SECTION_TIER = "sections"
+_URL = re.compile(r"https?://[^\s<>()\[\]\"'`]+")
+
+
+@dataclass
+class Section:
+    name: str
+    agent: str
+    build: object
+    task: str
+    version: str
+
+
+SECTIONS = {s.name: s for s in [
+    Section("overview", "Web Agent", build_web_agent, WEB_AGENT_TASK,
+            prompt_hash(MODEL_ID, WEB_AGENT_INSTRUCTIONS, WEB_AGENT_TASK)),
+    Section("financials", "Finance Agent", build_finance_agent, FINANCE_AGENT_TASK,
+            prompt_hash(MODEL_ID, FINANCE_AGENT_INSTRUCTIONS, FINANCE_AGENT_TASK)),
+    Section("research", "Research Agent", build_research_agent, RESEARCH_AGENT_TASK,
+            prompt_hash(MODEL_ID, RESEARCH_AGENT_DESCRIPTION, RESEARCH_AGENT_INSTRUCTIONS, RESEARCH_AGENT_TASK)),
+    # The video researcher takes the company name as its task
+    Section("videos", "YouTube Agent", build_video_researcher, "{company}", VIDEO_SUMMARY_VERSION),
+]}
+TIER_SECTIONS = {
+    "basic": ["overview", "financials", "research"],
+    "pro": ["overview", "financials", "research", "videos"],
+}
+
+
+def extract_sources(markdown):
+    return list(dict.fromkeys(url.rstrip(".,;:") for url in _URL.findall(markdown or "")))
+
+
+def load_sections(company, sections):
+    """Still-fresh cached sections of a company, keyed by section name."""
+    cache = get_cache()
+    found = {}
+    for name in sections:
+        entry = cache.get(company, SECTION_TIER, SECTIONS[name].version, name)
+        if entry:
+            found[name] = entry
+    return found
+
+
+def plan_sections(api_key, company, sections, refresh=False, prefix=""):
+    """Split a company's sections into reusable cached outputs and members to rerun.
+
+    Returns (members, cached outputs by member name, {member name: (company,
+    section, label)} for storing new output, provenance by label).
+    """
+    cached = {} if refresh else load_sections(company, sections)
+    members, outputs, targets, provenance = [], {}, {}, {}
+    for name in sections:
+        section = SECTIONS[name]
+        member_name, label = prefix + section.agent, prefix + name
+        targets[member_name] = (company, name, label)
+        if name in cached:
+            outputs[member_name] = cached[name]["content"]
+            provenance[label] = {**cached[name]["meta"], "expires_at": cached[name]["expires_at"], "reused": True}
+        else:
+            members.append(Member(member_name, section.build(api_key), section.task.format(company=company)))
+    return members, outputs, targets, provenance
+
+
+def _save_sections(events, targets, provenance, report, ttl=None, meta=None):
+    """Pass the events through, caching each newly written section and then the merged report.
+
+    report is the (company, tier, prompt version) key of the merged report.
+    """
+    cache = get_cache()
+    for event in events:
+        target = targets.get(event.agent)
+        if event.kind == AGENT_FINISHED and target and not (event.data or {}).get("cached") and event.content:
+            company, name, label = target
+            lifetime = section_ttl(name, ttl)
+            section_meta = {
+                "agent": SECTIONS[name].agent,
+                "generated_at": time.time(),
+                "sources": extract_sources(event.content),
+                "elapsed_s": round(event.elapsed or 0.0, 1),
+            }
+            cache.put(company, SECTION_TIER, SECTIONS[name].version, name, event.content, ttl=lifetime, meta=section_meta)
+            provenance[label] = {**section_meta, "expires_at": time.time() + lifetime, "reused": False}
+        elif event.kind == DONE:
+            result = event.result
+            result.meta["sections"] = provenance
+            # A report with a failed section is not kept; the next request only reruns that member
+            if not result.errors:
+                # The merged report is only as fresh as its stalest section
+                report_ttl = min([section_ttl("report", ttl)] + [p["expires_at"] - time.time() for p in provenance.values()])
+                cache.put(
+                    *report, "report", result.report, ttl=max(report_ttl, 0),
+                    meta={**(meta or {}), "sections": provenance, "wall_time": result.wall_time},
+                )
+        yield event
+
+
+def build_members(api_key, company, sections=None):
+    return [
+        Member(SECTIONS[name].agent, SECTIONS[name].build(api_key), SECTIONS[name].task.format(company=company))
+        for name in (TIER_SECTIONS["basic"] if sections is None else sections)
+    ]
+
+
+def bind_session(agents, session_id=None):
+    """Queue all of a run's model calls under one scheduler session."""
+    session_id = session_id or uuid.uuid4().hex
+    for agent in agents:
+        # VideoResearcher hands its session to the summarizers it creates
+        target = agent.model if isinstance(agent, Agent) else agent
+        target.scheduler_session = session_id
+    return session_id
+
+
+def research_stream(api_key, tier, company, tracer=None, refresh=False, ttl=None, meta=None, mode=None):
+    """Build agents for one run and cache what it produces; returns (events, number of agent steps).
+
+    Fresh cached sections are reused unless refresh is set, so only stale
+    members run before the synthesis. ttl overrides the per-section lifetimes
+    (except volatile ones such as financials) and mode the PIPELINE_MODE setting.
+    """
+    if (mode or PIPELINE_MODE) == "team":
+        # The team leader calls its members itself, so sections cannot be reused.
+        # It can only delegate to phi agents, so Pro gets the original YouTube agent.
+        members = build_members(api_key, company, [name for name in TIER_SECTIONS[tier] if name != "videos"])
+        if "videos" in TIER_SECTIONS[tier]:
+            members.append(Member("YouTube Agent", build_youtube_agent(api_key), company))
+        leader = build_team_leader(api_key, tier, members)
+        bind_session([leader] + [m.agent for m in members])
+        report = (company, tier, PROMPT_VERSIONS[tier])
+        # Nothing is cached per section here, so the report expires with its shortest-lived section
+        ttl = min(section_ttl(name, ttl) for name in TIER_SECTIONS[tier])
+        return _save_sections(stream_team(leader, company, tracer), {}, {}, report, ttl, meta), len(members) + 1
+    members, outputs, targets, provenance = plan_sections(api_key, company, TIER_SECTIONS[tier], refresh)
+    synthesizer = build_synthesis_agent(api_key, tier)
+    bind_session([synthesizer] + [m.agent for m in members])
+    events = stream_fanout(members, synthesizer, company, tracer, cached=outputs)
+    report = (company, tier, PROMPT_VERSIONS[tier])
+    return _save_sections(events, targets, provenance, report, ttl, meta), len(TIER_SECTIONS[tier]) + 1
+
+
+# Comparison mode: the overview and research members of every company run in
+# one fan-out, a single batched yfinance download replaces the per-company
+# Finance Agents, and one synthesis writes the side-by-side report.
+COMPARE_SECTIONS = ["overview", "research"]
+MARKET_DATA = "Market data"
+MAX_COMPARE = 5
+
+
+class MarketDataAgent:
+    """Stand-in member that returns the comparison table from tickers.compare_quotes."""
+
+    name = MARKET_DATA
+
+    def __init__(self, companies):
+        self.companies = companies
+
+    def run(self, message, stream=False, **kwargs):
+        return self._run() if stream else RunResponse(content=compare_quotes(self.companies))
+
+    def _run(self):
+        yield RunResponse(event="ToolCallStarted", tools=[{"tool_call_id": "download", "tool_name": "yfinance_download"}])
+        start = time.perf_counter()
+        table = compare_quotes(self.companies)
+        yield RunResponse(event="ToolCallCompleted", tools=[{
+            "tool_call_id": "download", "tool_name": "yfinance_download",
+            "content": table, "metrics": {"time": time.perf_counter() - start},
+        }])
+        yield RunResponse(content=table)
+
+
+def compare_key(companies):
+    """Report cache key for a comparison, independent of name order, case and suffixes like "Ltd"."""
+    return ", ".join(sorted(normalize_company(company) for company in companies))
+
+
+def compare_stream(api_key, companies, tracer=None, refresh=False, ttl=None):
+    """Research several companies at once; returns (events, number of agent steps)."""
+    members, outputs, targets, provenance = [], {}, {}, {}
+    for company in companies:
+        plan = plan_sections(api_key, company, COMPARE_SECTIONS, refresh, prefix=f"{company} · ")
+        members += plan[0]
+        outputs.update(plan[1])
+        targets.update(plan[2])
+        provenance.update(plan[3])
+    now = time.time()
+    members.append(Member(MARKET_DATA, MarketDataAgent(companies), ""))
+    provenance[MARKET_DATA] = {
+        "agent": "Yahoo Finance", "generated_at": now, "expires_at": now + SECTION_TTLS["financials"], "sources": [], "reused": False,
+    }
+    synthesizer = build_compare_agent(api_key)
+    bind_session([synthesizer] + [m.agent for m in members])
+    events = stream_fanout(members, synthesizer, ", ".join(companies), tracer, cached=outputs)
+    report = (compare_key(companies), "compare", PROMPT_VERSIONS["compare"])
+    return _save_sections(events, targets, provenance, report, ttl), len(companies) * len(COMPARE_SECTIONS) + 2
+
+
+def run_research(api_key, tier, company, tracer=None, refresh=False, ttl=None, meta=None, mode=None):
+    """Headless variant of research_stream that returns the finished PipelineResult."""
+    events, _ = research_stream(api_key, tier, company, tracer, refresh, ttl, meta, mode)
+    return drain(events)
@@ -0,0 +1,171 @@
+import argparse
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from agents import PROMPT_VERSIONS, TIER_SECTIONS, run_research
+from pipeline import PIPELINE_MODE
+from ratelimit import configure
+from report_cache import CACHE_DIR, HOUR, get_cache, normalize_company
+from tracing import Tracer
+
+# Headless pre-generation of reports for a whole placement drive:
+#
+#   python batch.py companies.csv --tier pro --workers 3
+#
+# Every company goes through the same pipeline as the Streamlit tabs and the
+# finished report (and its sections) is written to the report cache with
+# --ttl-hours, so the UI serves it instantly.
+# Progress is checkpointed after each company; rerunning the same command
+# resumes where an interrupted run stopped. Failed and partial companies are
+# retried, and so are finished ones whose cached report has since expired.
+
+
+def read_companies(path):
+    """Company names from a CSV (a "company" column, else the first column) or a text file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = [row for row in csv.reader(f) if row]
+            header = [cell.strip().lower() for cell in rows[0]] if rows else []
+            column = header.index("company") if "company" in header else 0
+            names = [row[column] for row in rows[1 if "company" in header else 0:] if len(row) > column]
+        else:
+            names = [line for line in f if not line.lstrip().startswith("#")]
+    companies, seen = [], set()
+    for name in (n.strip() for n in names):
+        if name and normalize_company(name) not in seen:
+            seen.add(normalize_company(name))
+            companies.append(name)
+    return companies
+
+
+def default_checkpoint(path, tier):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"batch-{name}-{tier}.json")
+
+
+def load_checkpoint(path, tier):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    # A prompt edit makes earlier reports stale, so start over
+    if data.get("tier") != tier or data.get("prompt_version") != PROMPT_VERSIONS[tier]:
+        return {}
+    return data.get("companies", {})
+
+
+def save_checkpoint(path, tier, companies):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    data = {"tier": tier, "prompt_version": PROMPT_VERSIONS[tier], "companies": companies}
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _worker(jobs, results, api_key, tier, ttl, refresh):
+    while True:
+        try:
+            company = jobs.get_nowait()
+        except queue.Empty:
+            return
+        start = time.perf_counter()
+        try:
+            tracer = Tracer(company=company, tier=tier, mode=PIPELINE_MODE, source="batch")
+            result = run_research(api_key, tier, company, tracer, refresh, ttl, meta={"source": "batch"})
+            results.put((company, result, None, time.perf_counter() - start))
+        except Exception as e:
+            results.put((company, None, str(e), time.perf_counter() - start))
+
+
+def run_batch(companies, api_key, tier, workers, ttl, checkpoint, refresh=False):
+    """Research every company not already done; returns the number that failed."""
+    cache = get_cache()
+    cache.purge_expired()
+    prompt_version = PROMPT_VERSIONS[tier]
+    progress = {} if refresh else load_checkpoint(checkpoint, tier)
+    todo = []
+    for company in companies:
+        # A "done" checkpoint only counts while its report is still cached; once it
+        # expires the company runs again, reusing whichever sections are still fresh
+        if not refresh and cache.get(company, tier, prompt_version):
+            print(f"skip  {company} (already generated)")
+            progress.setdefault(normalize_company(company), {"company": company, "status": "done"})
+        else:
+            todo.append(company)
+    print(f"{len(todo)} of {len(companies)} companies to research with {workers} workers ({tier}, {PIPELINE_MODE})")
+
+    jobs, results = queue.Queue(), queue.Queue()
+    for company in todo:
+        jobs.put(company)
+    # Daemon threads, as in the pipeline, so Ctrl+C does not wait for running agents
+    for i in range(min(workers, len(todo))):
+        threading.Thread(target=_worker, args=(jobs, results, api_key, tier, ttl, refresh), name=f"batch-{i}", daemon=True).start()
+
+    failed = 0
+    try:
+        for done in range(1, len(todo) + 1):
+            while True:
+                try:
+                    company, result, error, elapsed = results.get(timeout=1)
+                    break
+                except queue.Empty:
+                    continue
+            entry = {"company": company, "elapsed_s": round(elapsed, 1), "finished_at": time.time()}
+            if error is None:
+                # run_research has already cached the sections and, if none failed, the merged report
+                status = "partial" if result.errors else "done"
+                entry.update(status=status, errors=result.errors, reused=result.reused)
+                print(f"[{done}/{len(todo)}] {status:<7} {company} in {elapsed:.0f}s")
+            else:
+                failed += 1
+                entry.update(status="failed", error=error)
+                print(f"[{done}/{len(todo)}] failed  {company} after {elapsed:.0f}s: {error}")
+            progress[normalize_company(company)] = entry
+            save_checkpoint(checkpoint, tier, progress)
+    except KeyboardInterrupt:
+        save_checkpoint(checkpoint, tier, progress)
+        print(f"\nInterrupted; progress saved to {checkpoint}. Rerun the same command to resume.")
+        raise
+    save_checkpoint(checkpoint, tier, progress)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate CompanyPrep reports for a list of companies.")
+    parser.add_argument("companies", help="CSV file with a 'company' column, or a text file with one company per line")
+    parser.add_argument("--tier", choices=sorted(TIER_SECTIONS), default="basic")
+    parser.add_argument("--api-key", default=os.environ.get("GOOGLE_API_KEY"), help="Gemini API key (default: $GOOGLE_API_KEY)")
+    parser.add_argument("--workers", type=int, default=2, help="companies researched at the same time")
+    parser.add_argument("--ttl-hours", type=float, default=72, help="how long the reports stay servable from the cache")
+    parser.add_argument("--gemini-rpm", type=float, default=10, help="Gemini requests per minute across all workers")
+    parser.add_argument("--search-rpm", type=float, default=20, help="DuckDuckGo searches per minute across all workers")
+    parser.add_argument("--checkpoint", help="progress file (default: inside the cache folder)")
+    parser.add_argument("--refresh", action="store_true", help="ignore the checkpoint and cached reports")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or GOOGLE_API_KEY)")
+
+    companies = read_companies(args.companies)
+    if not companies:
+        parser.error(f"no companies found in {args.companies}")
+    configure("gemini", args.gemini_rpm)
+    configure("duckduckgo", args.search_rpm)
+    checkpoint = args.checkpoint or default_checkpoint(args.companies, args.tier)
+    try:
+        failed = run_batch(companies, args.api_key, args.tier, max(1, args.workers), args.ttl_hours * HOUR, checkpoint, args.refresh)
+    except KeyboardInterrupt:
+        return 130
+    if failed:
+        print(f"{failed} companies failed; rerun to retry them.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,608 @@
+import argparse
+import hashlib
+import importlib
+import json
+import math
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from functools import wraps
+from types import SimpleNamespace
+
+# Offline benchmark for the research pipelines. Model responses and tool
+# results are recorded once from a live run:
+#
+#   python benchmark.py record Infosys "Tata Motors" --tiers basic pro --modes fanout team
+#
+# and then replayed with no network as often as needed:
+#
+#   python benchmark.py run --runs 5
+#   python benchmark.py run --runs 5 --model-latency 2 --tool-latency 0.5 --output after.json --baseline before.json
+#
+# Only the wire is replaced: the Gemini client (agents.set_client_hook) and the
+# tool entrypoints. The real phi agents, pipeline, scheduler and caches still
+# run, so sequential calls, extra parsing or repeated fetches show up in the
+# numbers. Replayed calls sleep for their recorded duration (times --scale),
+# or for a fixed --model-latency / --tool-latency.
+#
+# Every run is a separate process with empty caches (a cold report). Repository
+# modules are imported inside it only after the caches point at a temporary folder,
+# and the tool libraries are loaded before measuring starts.
+
+FIXTURES_PATH = os.path.join(os.environ.get("COMPANYPREP_CACHE_DIR", ".companyprep_cache"), "benchmark_fixtures.json")
+TIERS = ("basic", "pro")
+MODES = ("fanout", "team")
+
+# Network calls made outside phi tools (the Pro videos section), recorded like tools
+CALL_SEAMS = [("transcripts", "find_videos"), ("transcripts", "get_transcript")]
+
+USAGE_FIELDS = ("prompt_token_count", "candidates_token_count", "total_token_count")
+_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[ T][\d:.]+")
+
+
+def request_key(contents):
+    """Fixture key of a model request: its prompt up to the first user message, plus the model turns since.
+
+    Timestamps (add_datetime_to_instructions) are masked so recordings stay valid.
+    """
+    prompt, turns, seen_user = [], 0, False
+    for entry in contents:
+        if seen_user:
+            turns += entry["role"] == "model"
+            continue
+        prompt.extend(getattr(part, "text", "") or "" for part in entry["parts"])
+        seen_user = entry["role"] == "user"
+    text = _TIMESTAMP.sub("<time>", "\n".join(prompt))
+    return f"{hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]}:{turns}", prompt[-1] if prompt else ""
+
+
+def tool_key(name, args, kwargs):
+    return f"{name}:{json.dumps([args, kwargs], sort_keys=True, default=str)}"
+
+
+class Fixtures:
+    """Recorded model responses and tool results."""
+
+    def __init__(self, data=None):
+        self.data = data or {"models": {}, "tools": {}, "runs": []}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.data, f, default=str)
+        os.replace(path + ".tmp", path)
+
+    @property
+    def runs(self):
+        return self.data["runs"]
+
+    def model(self, key):
+        return self.data["models"].get(key)
+
+    def tool(self, key):
+        return self.data["tools"].get(key)
+
+    def add_model(self, key, hint, chunks):
+        with self._lock:
+            self.data["models"][key] = {"hint": hint[:120], "chunks": chunks}
+
+    def add_tool(self, key, entry):
+        with self._lock:
+            self.data["tools"][key] = entry
+
+    def add_run(self, company, tier, mode):
+        run = {"company": company, "tier": tier, "mode": mode}
+        if run not in self.runs:
+            self.runs.append(run)
+
+    def merge(self, other):
+        self.data["models"].update(other.data["models"])
+        self.data["tools"].update(other.data["tools"])
+        for run in other.runs:
+            self.add_run(**run)
+
+
+class Latency:
+    """Synthetic latency: fixed seconds when given, else the recorded time times scale."""
+
+    def __init__(self, scale=1.0, model=None, tool=None):
+        self.scale = scale
+        self.model_s = model
+        self.tool_s = tool
+
+    def model(self, recorded):
+        return self.model_s if self.model_s is not None else recorded * self.scale
+
+    def tool(self, recorded):
+        return self.tool_s if self.tool_s is not None else recorded * self.scale
+
+
+class Stats:
+    def __init__(self):
+        self.model_calls = 0
+        self.misses = 0
+        self.tool_calls = Counter()
+        self._lock = threading.Lock()
+
+    def model_call(self, hit=True):
+        with self._lock:
+            self.model_calls += 1
+            self.misses += not hit
+
+    def tool_call(self, key):
+        with self._lock:
+            self.tool_calls[key] += 1
+
+
+# Gemini responses. phi only reads candidates[0].content (role and parts,
+# each converted with type(part).to_dict) and usage_metadata, so recordings
+# keep exactly that.
+def _chunk_data(response, offset):
+    content = response.candidates[0].content
+    usage = response.usage_metadata
+    return {
+        "t": round(offset, 4),
+        "role": content.role,
+        "parts": [type(part).to_dict(part) for part in content.parts],
+        "usage": {name: getattr(usage, name, 0) or 0 for name in USAGE_FIELDS} if usage else None,
+    }
+
+
+class _Part:
+    def __init__(self, data):
+        self.data = data
+
+    @staticmethod
+    def to_dict(part):
+        return part.data
+
+
+def _response(chunk):
+    content = SimpleNamespace(role=chunk["role"], parts=[_Part(part) for part in chunk["parts"]])
+    usage = SimpleNamespace(**chunk["usage"]) if chunk.get("usage") else None
+    return SimpleNamespace(candidates=[SimpleNamespace(content=content)], usage_metadata=usage)
+
+
+def _merge(chunks):
+    """One non-streamed response from recorded stream chunks."""
+    text = "".join(part["text"] for chunk in chunks for part in chunk["parts"] if "text" in part)
+    parts = ([{"text": text}] if text else []) + [part for chunk in chunks for part in chunk["parts"] if "text" not in part]
+    return {**chunks[-1], "parts": parts, "usage": next((c["usage"] for c in reversed(chunks) if c.get("usage")), None)}
+
+
+class RecordingClient:
+    """Wraps the real Gemini client and stores every response under its request key."""
+
+    def __init__(self, client, fixtures, stats):
+        self.client = client
+        self.fixtures = fixtures
+        self.stats = stats
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        self.stats.model_call()
+        key, hint = request_key(contents)
+        start = time.perf_counter()
+        if not stream:
+            response = self.client.generate_content(contents=contents, **kwargs)
+            self.fixtures.add_model(key, hint, [_chunk_data(response, time.perf_counter() - start)])
+            return response
+        return self._stream(key, hint, start, self.client.generate_content(contents=contents, stream=True, **kwargs))
+
+    def _stream(self, key, hint, start, responses):
+        chunks = []
+        for response in responses:
+            chunks.append(_chunk_data(response, time.perf_counter() - start))
+            yield response
+        self.fixtures.add_model(key, hint, chunks)
+
+
+class ReplayClient:
+    """Stand-in Gemini client that answers from the fixtures after a synthetic delay."""
+
+    def __init__(self, fixtures, stats, latency):
+        self.fixtures = fixtures
+        self.stats = stats
+        self.latency = latency
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        key, hint = request_key(contents)
+        entry = self.fixtures.model(key)
+        self.stats.model_call(entry is not None)
+        if entry is None:
+            raise LookupError(f"No recorded model response for {hint[:60]!r} (turn {key.split(':')[1]}); record the fixtures again")
+        chunks = entry["chunks"]
+        total = self.latency.model(chunks[-1]["t"])
+        if not stream:
+            time.sleep(total)
+            return _response(_merge(chunks))
+        return self._stream(chunks, total)
+
+    def _stream(self, chunks, total):
+        start, last = time.perf_counter(), chunks[-1]["t"]
+        for i, chunk in enumerate(chunks, 1):
+            # Keep the recorded pacing between chunks, stretched to the total delay
+            due = total * (chunk["t"] / last if last else i / len(chunks))
+            time.sleep(max(0.0, due - (time.perf_counter() - start)))
+            yield _response(chunk)
+
+
+def _wrap_call(name, fn, fixtures, stats, latency, record):
+    @wraps(fn)
+    def call(*args, **kwargs):
+        key = tool_key(name, args, kwargs)
+        stats.tool_call(key)
+        if record:
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                fixtures.add_tool(key, {"error": str(e), "elapsed": time.perf_counter() - start})
+                raise
+            fixtures.add_tool(key, {"result": result, "tuple": isinstance(result, tuple), "elapsed": time.perf_counter() - start})
+            return result
+        entry = fixtures.tool(key)
+        if entry is None:
+            raise LookupError(f"No recorded result for {name}{json.dumps(kwargs or args, default=str)[:80]}; record the fixtures again")
+        time.sleep(latency.tool(entry["elapsed"]))
+        if "error" in entry:
+            raise RuntimeError(entry["error"])
+        return tuple(entry["result"]) if entry["tuple"] else entry["result"]
+    return call
+
+
+def instrument(fixtures, stats, latency, record):
+    """Route model requests, phi tool functions and CALL_SEAMS through the fixtures."""
+    from phi.model.google import Gemini
+
+    import agents
+
+    if record:
+        agents.set_client_hook(lambda model: RecordingClient(Gemini.get_client(model), fixtures, stats))
+    else:
+        agents.set_client_hook(lambda model: ReplayClient(fixtures, stats, latency))
+    # Every agent builds its own toolkits, so the hook wraps each new function.
+    # phi reads the tool schema from the entrypoint, which wraps() keeps intact.
+    agents.set_tool_hook(lambda function: _wrap_call(function.name, function.entrypoint, fixtures, stats, latency, record))
+    for module_name, attr in CALL_SEAMS:
+        module = importlib.import_module(module_name)
+        setattr(module, attr, _wrap_call(f"{module_name}.{attr}", getattr(module, attr), fixtures, stats, latency, record))
+
+
+def tool_agents(api_key):
+    """One of every tool-using agent, with its toolkits registered on the model as a run does."""
+    import agents
+
+    built = []
+    for build in (agents.build_web_agent, agents.build_finance_agent, agents.build_research_agent, agents.build_youtube_agent, agents.build_stock_agent):
+        agent = build(api_key)
+        # No request is made
+        agent.update_model()
+        built.append(agent)
+    return built
+
+
+def measure(args):
+    """Run one report in this process and return its measurements."""
+    import agents
+    from pipeline import AGENT_FINISHED, DONE
+    from ratelimit import DEFAULT_RPM, configure
+    from tracing import Tracer
+
+    # Replayed calls are not throttled unless asked to be
+    for provider in DEFAULT_RPM:
+        configure(provider, 0)
+    if args.gemini_rpm:
+        configure("gemini", args.gemini_rpm)
+    record = bool(args.record)
+    fixtures = Fixtures() if record else Fixtures.load(args.fixtures)
+    stats = Stats()
+    instrument(fixtures, stats, Latency(args.scale, args.model_latency, args.tool_latency), record)
+    api_key = os.environ.get("GOOGLE_API_KEY") if record else "replay"
+
+    # Import the tool libraries and build each kind of agent once up front, so the
+    # clocks and traced memory cover the pipeline rather than the imports
+    tool_agents(api_key)
+    tracer = Tracer(sinks=[], company=args.company, tier=args.tier, mode=args.mode)
+    agent_times, result, error = {}, None, None
+    tracemalloc.start()
+    cpu, start = time.process_time(), time.perf_counter()
+    try:
+        events, _ = agents.research_stream(api_key, args.tier, args.company, tracer, refresh=True, mode=args.mode)
+        for event in events:
+            if event.kind == AGENT_FINISHED and event.agent:
+                agent_times[event.agent] = event.elapsed or 0.0
+            elif event.kind == DONE:
+                result = event.result
+    except Exception as e:
+        error = str(e)
+    wall, cpu = time.perf_counter() - start, time.process_time() - cpu
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    if record:
+        fixtures.add_run(args.company, args.tier, args.mode)
+        fixtures.save(args.record)
+    model_calls = tracer.summary()
+    return {
+        "company": args.company,
+        "tier": args.tier,
+        "mode": args.mode,
+        "wall_s": wall,
+        "first_byte_s": result.first_byte_time if result else None,
+        "cpu_s": cpu,
+        "peak_mb": peak / 2 ** 20,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "model_calls": stats.model_calls,
+        "fixture_misses": stats.misses,
+        "tool_calls": sum(stats.tool_calls.values()),
+        "duplicate_tool_calls": sum(n - 1 for n in stats.tool_calls.values()),
+        # Team members only show up through the leader, so their model calls are not broken out
+        "agents": {
+            name: {"time_s": elapsed, "model_calls": model_calls[name]["model_calls"] if name in model_calls else None}
+            for name, elapsed in agent_times.items()
+        },
+        "errors": dict(result.errors) if result else {},
+        "error": error,
+    }
+
+
+def once(args):
+    workdir = tempfile.mkdtemp(prefix="companyprep-bench-")
+    os.environ["COMPANYPREP_CACHE_DIR"] = workdir
+    os.environ["COMPANYPREP_TRACE_FILE"] = ""
+    try:
+        data = measure(args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if args.result:
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    else:
+        print(json.dumps(data, indent=2))
+    return 0
+
+
+def _child(args, company, tier, mode, record=False):
+    """Run `once` in a fresh process; returns (measurements, recorded fixtures or None)."""
+    with tempfile.TemporaryDirectory(prefix="companyprep-bench-") as tmp:
+        result, log, fragment = (os.path.join(tmp, name) for name in ("result.json", "log.txt", "fixtures.json"))
+        command = [
+            sys.executable, os.path.abspath(__file__), "once", company, "--tier", tier, "--mode", mode,
+            "--fixtures", os.path.abspath(args.fixtures), "--result", result, "--scale", str(args.scale),
+            "--gemini-rpm", str(args.gemini_rpm or 0),
+        ]
+        if args.model_latency is not None:
+            command += ["--model-latency", str(args.model_latency)]
+        if args.tool_latency is not None:
+            command += ["--tool-latency", str(args.tool_latency)]
+        if record:
+            command += ["--record", fragment]
+        # phi's debug logging goes to the log, which is only shown on failure
+        with open(log, "w", encoding="utf-8") as f:
+            code = subprocess.run(command, stdout=f, stderr=subprocess.STDOUT).returncode
+        if code or not os.path.exists(result):
+            with open(log, encoding="utf-8", errors="replace") as f:
+                tail = "".join(f.readlines()[-20:])
+            raise RuntimeError(f"{tier}/{mode} run for {company} exited with {code}:\n{tail}")
+        with open(result, encoding="utf-8") as f:
+            data = json.load(f)
+        return data, Fixtures.load(fragment) if record else None
+
+
+def percentile(values, q):
+    """Nearest-rank percentile."""
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))]
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def summarize(runs):
+    """Per tier/mode: latency percentiles, calls, memory and per-agent means."""
+    groups = {}
+    for run in runs:
+        groups.setdefault(f"{run['tier']}/{run['mode']}", []).append(run)
+    summary = {}
+    for name, group in groups.items():
+        ok = [r for r in group if not r["error"] and not r["errors"]] or group
+        walls = [r["wall_s"] for r in ok]
+        agents = {}
+        for run in ok:
+            for agent, data in run["agents"].items():
+                agents.setdefault(agent, []).append(data)
+        summary[name] = {
+            "runs": len(group),
+            "failed": len(group) - len([r for r in group if not r["error"] and not r["errors"]]),
+            "p50_s": percentile(walls, 50),
+            "p95_s": percentile(walls, 95),
+            "first_byte_p50_s": percentile([r["first_byte_s"] for r in ok if r["first_byte_s"] is not None] or [0.0], 50),
+            "cpu_s": _mean([r["cpu_s"] for r in ok]),
+            "model_calls": _mean([r["model_calls"] for r in ok]),
+            "tool_calls": _mean([r["tool_calls"] for r in ok]),
+            "duplicate_tool_calls": _mean([r["duplicate_tool_calls"] for r in ok]),
+            "peak_mb": max(r["peak_mb"] for r in ok),
+            "max_rss_mb": max(r["max_rss_mb"] for r in ok),
+            "agents": {
+                agent: {"time_s": _mean([d["time_s"] for d in data]), "model_calls": _mean([d["model_calls"] for d in data])}
+                for agent, data in agents.items()
+            },
+        }
+    return summary
+
+
+def _fmt(value, digits=1):
+    if value is None:
+        return "-"
+    return f"{value:.{digits}f}" if isinstance(value, float) else str(value)
+
+
+def _table(headers, rows):
+    rows = [[_fmt(cell) for cell in row] for row in rows]
+    widths = [max([len(str(h))] + [len(r[i]) for r in rows]) for i, h in enumerate(headers)]
+    lines = ["  ".join(str(h).ljust(w) for h, w in zip(headers, widths))]
+    lines.append("  ".join("-" * w for w in widths))
+    lines += ["  ".join(cell.rjust(w) if i else cell.ljust(w) for i, (cell, w) in enumerate(zip(row, widths))) for row in rows]
+    return "\n".join(lines)
+
+
+def print_summary(summary):
+    print(_table(
+        ["Pipeline", "Runs", "Failed", "p50 s", "p95 s", "First byte s", "CPU s", "Model calls", "Tool calls", "Duplicate tools", "Peak MB", "Max RSS MB"],
+        [[name, s["runs"], s["failed"], s["p50_s"], s["p95_s"], s["first_byte_p50_s"], s["cpu_s"], s["model_calls"],
+          s["tool_calls"], s["duplicate_tool_calls"], s["peak_mb"], s["max_rss_mb"]] for name, s in summary.items()],
+    ))
+    for name, s in summary.items():
+        print(f"\n{name} per agent (mean)")
+        print(_table(["Agent", "Time s", "Model calls"], [[agent, a["time_s"], a["model_calls"]] for agent, a in s["agents"].items()]))
+
+
+def compare(summary, baseline, tolerance):
+    """Print regressions against a saved summary; returns how many there are."""
+    checks = [("p95_s", True), ("cpu_s", True), ("peak_mb", True), ("model_calls", False), ("tool_calls", False), ("duplicate_tool_calls", False)]
+    regressions = 0
+    for name, s in summary.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for field, relative in checks:
+            old, new = before.get(field), s.get(field)
+            if old is None or new is None:
+                continue
+            # Timings and memory get some slack; call counts replay exactly
+            limit = old * (1 + tolerance) if relative else old
+            if new > limit + 1e-9:
+                regressions += 1
+                change = f" ({(new - old) / old:+.0%})" if old else ""
+                print(f"REGRESSION {name} {field}: {_fmt(old, 2)} -> {_fmt(new, 2)}{change}")
+    print(f"{regressions} regressions against the baseline (tolerance {tolerance:.0%})")
+    return regressions
+
+
+def record(args):
+    if not os.environ.get("GOOGLE_API_KEY"):
+        raise SystemExit("Recording calls the live APIs; set GOOGLE_API_KEY first")
+    fixtures = Fixtures.load(args.fixtures) if os.path.exists(args.fixtures) else Fixtures()
+    for company in args.companies:
+        for tier in args.tiers:
+            for mode in args.modes:
+                data, fragment = _child(args, company, tier, mode, record=True)
+                fixtures.merge(fragment)
+                fixtures.save(args.fixtures)
+                status = f"errors: {data['error'] or data['errors']}" if data["error"] or data["errors"] else "ok"
+                print(f"recorded {tier:<5} {mode:<6} {company}: {data['model_calls']} model calls, "
+                      f"{data['tool_calls']} tool calls in {data['wall_s']:.0f}s ({status})")
+    print(f"Fixtures saved to {args.fixtures}")
+    return 0
+
+
+def run(args):
+    if not os.path.exists(args.fixtures):
+        raise SystemExit(f"No fixtures at {args.fixtures}; record some first")
+    fixtures = Fixtures.load(args.fixtures)
+    runs = [
+        r for r in fixtures.runs
+        if r["tier"] in args.tiers and r["mode"] in args.modes and (not args.companies or r["company"] in args.companies)
+    ]
+    if not runs:
+        raise SystemExit(f"No recorded runs in {args.fixtures} match; record some first")
+    results = []
+    for r in runs:
+        for i in range(args.runs):
+            data, _ = _child(args, r["company"], r["tier"], r["mode"])
+            results.append(data)
+            problem = data["error"] or "; ".join(f"{k}: {v}" for k, v in data["errors"].items())
+            print(f"{r['tier']}/{r['mode']} {r['company']} #{i + 1}: {data['wall_s']:.2f}s" + (f" FAILED {problem}" if problem else ""))
+    summary = summarize(results)
+    print()
+    print_summary(summary)
+    if args.output:
+        settings = {k: getattr(args, k) for k in ("runs", "scale", "model_latency", "tool_latency", "gemini_rpm")}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "summary": summary, "runs": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+        print()
+        return 1 if compare(summary, baseline, args.tolerance) else 0
+    return 0
+
+
+def check_tools(args):
+    """Build --agents of every tool-using agent and check that each tool entrypoint is wrapped once."""
+    deepest, built = 0, 0
+    for _ in range(args.agents):
+        for agent in tool_agents("check"):
+            built += 1
+            for function in agent.model.functions.values():
+                depth, entrypoint = 0, function.entrypoint
+                while hasattr(entrypoint, "__wrapped__"):
+                    depth, entrypoint = depth + 1, entrypoint.__wrapped__
+                deepest = max(deepest, depth)
+    print(f"{built} agents built, deepest tool entrypoint wrapping: {deepest}")
+    return 0 if deepest <= 1 else 1
+
+
+def main(argv=None):
+    replay = argparse.ArgumentParser(add_help=False)
+    replay.add_argument("--fixtures", default=FIXTURES_PATH, help=f"fixtures file (default: {FIXTURES_PATH})")
+    replay.add_argument("--scale", type=float, default=1.0, help="multiply recorded latencies by this")
+    replay.add_argument("--model-latency", type=float, help="fixed seconds per model request instead of the recorded time")
+    replay.add_argument("--tool-latency", type=float, help="fixed seconds per tool call instead of the recorded time")
+    replay.add_argument("--gemini-rpm", type=float, default=0, help="apply the Gemini request scheduler at this limit (default: off)")
+
+    parser = argparse.ArgumentParser(description="Record and replay CompanyPrep pipelines to measure latency, calls and memory offline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("record", parents=[replay], help="run live and save model and tool responses as fixtures")
+    p.add_argument("companies", nargs="+")
+    p.add_argument("--tiers", nargs="+", choices=TIERS, default=list(TIERS))
+    p.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    p.set_defaults(handler=record)
+
+    p = commands.add_parser("run", parents=[replay], help="replay the recorded runs and report latency, calls and memory")
+    p.add_argument("--companies", nargs="+", help="only these recorded companies")
+    p.add_argument("--tiers", nargs="+", choices=TIERS, default=list(TIERS))
+    p.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    p.add_argument("--runs", type=int, default=5, help="repetitions of each recorded run")
+    p.add_argument("--output", help="save the summary and raw runs as JSON")
+    p.add_argument("--baseline", help="a saved --output to compare against; exits 1 on regressions")
+    p.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown against the baseline")
+    p.set_defaults(handler=run)
+
+    p = commands.add_parser("once", parents=[replay], help="replay (or with --record, record) one report in this process")
+    p.add_argument("company")
+    p.add_argument("--tier", choices=TIERS, default="basic")
+    p.add_argument("--mode", choices=MODES, default="fanout")
+    p.add_argument("--record", help="record live into this fixtures file instead of replaying")
+    p.add_argument("--result", help="write the measurements here instead of printing them")
+    p.set_defaults(handler=once)
+
+    p = commands.add_parser("tools", help="build many agents offline and check their tool functions are not wrapped repeatedly")
+    p.add_argument("--agents", type=int, default=200, help="agents of each kind to build")
+    p.set_defaults(handler=check_tools)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import newspaper
+import requests
+from duckduckgo_search import DDGS
+from phi.tools.duckduckgo import DuckDuckGo
+from phi.tools.newspaper4k import Newspaper4k
+from phi.tools.youtube_tools import YouTubeTools
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ratelimit import acquire, call
+import transcripts
+from report_cache import CACHE_DIR, DAY, HOUR, PURGE_INTERVAL
+
+# Shared fetch layer behind the web search, article and YouTube tools. Every agent in
+# every session goes through the same process-wide pieces:
+#   - identical in-flight requests are coalesced (single flight), so two
+#     sessions researching the same company do the network work once
+#   - search results and extracted article text are cached on disk by query/URL;
+#     expired articles are revalidated with ETag / Last-Modified
+#   - articles are downloaded through one pooled requests.Session
+# Only real network calls go through the request scheduler; cache hits are free.
+
+FETCH_CACHE_PATH = os.path.join(CACHE_DIR, "fetch.sqlite3")
+
+SEARCH_TTLS = {"search": 6 * HOUR, "news": HOUR, "videos": DAY}
+ARTICLE_TTL = DAY
+# Expired articles with an ETag/Last-Modified are kept this much longer for revalidation
+ARTICLE_STALE_TTL = 7 * DAY
+HTTP_TIMEOUT = 15
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+
+class FetchCache:
+    def __init__(self, path=FETCH_CACHE_PATH):
+        self.path = path
+        self._purged_at = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return the stored entry, expired or not (its validators are still useful), or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT content, etag, last_modified, fetched_at, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        content, etag, last_modified, fetched_at, expires_at = row
+        return {
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+            "fresh": expires_at > time.time(),
+        }
+
+    def put(self, key, content, ttl, etag=None, last_modified=None):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, content, etag, last_modified, now, now + ttl),
+            )
+        if now - self._purged_at > PURGE_INTERVAL:
+            self.purge_expired()
+
+    def touch(self, key, ttl):
+        with self._connect() as conn:
+            conn.execute("UPDATE responses SET expires_at = ? WHERE key = ?", (time.time() + ttl, key))
+
+    def purge_expired(self):
+        """Delete expired responses; articles with validators are kept for ARTICLE_STALE_TTL to revalidate."""
+        self._purged_at = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM responses WHERE expires_at <= ? AND (etag IS NULL AND last_modified IS NULL OR expires_at <= ?)",
+                (self._purged_at, self._purged_at - ARTICLE_STALE_TTL),
+            ).rowcount
+
+
+@dataclass
+class _Call:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: object = None
+    error: Exception = None
+
+
+class SingleFlight:
+    """Run fn once per key at a time; concurrent callers wait for and share its result."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+_lock = threading.Lock()
+_cache = None
+_session = None
+_flight = SingleFlight()
+
+
+def get_fetch_cache():
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = FetchCache()
+        return _cache
+
+
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+        return _session
+
+
+def search(query, max_results=5, kind="search"):
+    """DuckDuckGo results ("search", "news" or "videos") as the JSON string the phi tool returns."""
+    key = f"{kind}:{max_results}:{' '.join(query.casefold().split())}"
+    return _flight.do(key, lambda: _search(key, query, max_results, kind))
+
+
+def _search(key, query, max_results, kind):
+    cache = get_fetch_cache()
+    entry = cache.get(key)
+    if entry and entry["fresh"]:
+        return entry["content"]
+    ddgs = DDGS(timeout=HTTP_TIMEOUT)
+    fetch = {"search": ddgs.text, "news": ddgs.news, "videos": ddgs.videos}[kind]
+    results = call("duckduckgo", lambda: fetch(keywords=query, max_results=max_results))
+    content = json.dumps(results, indent=2)
+    cache.put(key, content, SEARCH_TTLS[kind])
+    return content
+
+
+def article_data(url):
+    """Title, authors, text and publish date of an article, fetched and parsed once per URL."""
+    key = "article:" + url
+    return json.loads(_flight.do(key, lambda: _article(key, url)))
+
+
+def _article(key, url):
+    cache = get_fetch_cache()
+    entry = cache.get(key)
+    if entry and entry["fresh"]:
+        return entry["content"]
+    headers = {}
+    if entry and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+    acquire("articles")
+    response = get_session().get(url, headers=headers, timeout=HTTP_TIMEOUT)
+    if response.status_code == 304 and entry:
+        cache.touch(key, ARTICLE_TTL)
+        return entry["content"]
+    response.raise_for_status()
+
+    article = newspaper.article(url, input_html=response.text)
+    data = {}
+    if article.title:
+        data["title"] = article.title
+    if article.authors:
+        data["authors"] = article.authors
+    if article.text:
+        data["text"] = article.text
+    try:
+        if article.publish_date:
+            data["publish_date"] = article.publish_date.isoformat()
+    except Exception:
+        pass
+    content = json.dumps(data)
+    cache.put(key, content, ARTICLE_TTL, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return content
+
+
+class SharedDuckDuckGo(DuckDuckGo):
+    # No docstrings here: phi takes the tool descriptions from the parent
+    # methods, and it builds the argument schema from these annotations.
+    def duckduckgo_search(self, query: str, max_results: int = 5) -> str:
+        if self.modifier:
+            query = self.modifier + " " + query
+        return search(query, self.fixed_max_results or max_results)
+
+    def duckduckgo_news(self, query: str, max_results: int = 5) -> str:
+        return search(query, self.fixed_max_results or max_results, kind="news")
+
+
+class SharedNewspaper4k(Newspaper4k):
+    def get_article_data(self, url):
+        try:
+            return article_data(url) or None
+        except Exception:
+            return None
+
+
+class SharedYouTubeTools(YouTubeTools):
+    # youtube-transcript-api 1.x dropped the get_transcript call YouTubeTools
+    # makes, so captions come from the transcript store, which throttles itself
+    def get_youtube_video_captions(self, url: str) -> str:
+        vid = transcripts.video_id(url)
+        if not vid:
+            return "Error getting video ID from URL, please provide a valid YouTube url"
+        try:
+            transcript, _ = transcripts.get_transcript({"id": vid, "title": None})
+        except Exception as e:
+            return f"Error getting captions for video: {e}"
+        return transcript or "No captions found for video"
+
+    def get_youtube_video_data(self, url: str) -> str:
+        acquire("youtube")
+        return super().get_youtube_video_data(url)
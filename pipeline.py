@@ -0,0 +1,293 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+from tracing import AGENT_SPAN, MODEL_SPAN, PIPELINE_SPAN, TOOL_SPAN, Tracer
+
+# Orchestration for the research pipeline. The agents themselves are built by
+# the caller; this module only decides how they are run.
+#
+#   "fanout" - member agents run in parallel threads, then a synthesis agent
+#              merges their outputs (latency ~ slowest member + synthesis)
+#   "team"   - the original phi team leader, which calls members one by one
+#              (latency ~ sum of all members)
+#
+# Both modes are generators of PipelineEvent so the UI can render partial
+# Markdown as it arrives; drain() returns just the result for batch callers.
+# Agent runs, tool calls and model calls are also recorded as trace spans.
+
+PIPELINE_MODE = os.environ.get("COMPANYPREP_PIPELINE", "fanout")
+DEFAULT_AGENT_TIMEOUT = float(os.environ.get("COMPANYPREP_AGENT_TIMEOUT", "180"))
+
+# Event kinds
+AGENT_STARTED = "agent_started"
+AGENT_CHUNK = "agent_chunk"
+TOOL_STARTED = "tool_started"
+TOOL_FINISHED = "tool_finished"
+MODEL_CALL = "model_call"
+AGENT_FINISHED = "agent_finished"
+AGENT_FAILED = "agent_failed"
+REPORT_CHUNK = "report_chunk"
+DONE = "done"
+
+# phi RunEvent values we care about
+_RUN_RESPONSE = "RunResponse"
+_TOOL_CALL_STARTED = "ToolCallStarted"
+_TOOL_CALL_COMPLETED = "ToolCallCompleted"
+_RUN_COMPLETED = "RunCompleted"
+
+
+@dataclass
+class Member:
+    name: str
+    agent: object
+    task: str
+    timeout: float = DEFAULT_AGENT_TIMEOUT
+
+
+@dataclass
+class PipelineResult:
+    report: str
+    outputs: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    wall_time: float = 0.0
+    first_byte_time: float = None
+    trace: Tracer = None
+    reused: list = field(default_factory=list)
+    meta: dict = field(default_factory=dict)
+
+    @property
+    def sequential_time(self):
+        """What the same runs would have cost back to back."""
+        return sum(self.timings.values())
+
+
+@dataclass
+class PipelineEvent:
+    kind: str
+    agent: str = None
+    content: str = ""
+    elapsed: float = None
+    data: dict = None
+    result: PipelineResult = None
+
+
+def _tool_finished(tool):
+    content = tool.get("content")
+    return {
+        "tool": tool.get("tool_name", ""),
+        "duration": (tool.get("metrics") or {}).get("time", 0.0),
+        "bytes": len(str(content).encode("utf-8")) if content is not None else 0,
+        "error": bool(tool.get("tool_call_error")),
+    }
+
+
+def _model_calls(messages):
+    for message in messages or []:
+        metrics = getattr(message, "metrics", None)
+        if getattr(message, "role", None) in ("assistant", "model") and metrics:
+            yield {
+                "start_time": getattr(message, "created_at", None) or time.time(),
+                "duration": metrics.get("time", 0.0),
+                "input_tokens": metrics.get("input_tokens", 0),
+                "output_tokens": metrics.get("output_tokens", 0),
+                "time_to_first_token": metrics.get("time_to_first_token"),
+            }
+
+
+def stream_agent(agent, message, name=None, tracer=None, parent=None):
+    """Yield PipelineEvents for one agent run without re-reading its history."""
+    name = name or getattr(agent, "name", None) or "Agent"
+    tracer = tracer or Tracer(sinks=[])
+    span = tracer.start_span(AGENT_SPAN, parent, agent=name)
+    open_tools = []
+    status, error = "ok", None
+    try:
+        for chunk in agent.run(message, stream=True, stream_intermediate_steps=True):
+            event = getattr(chunk, "event", _RUN_RESPONSE)
+            if event == _RUN_RESPONSE:
+                if chunk.content:
+                    yield PipelineEvent(AGENT_CHUNK, name, chunk.content)
+            elif event == _TOOL_CALL_STARTED and chunk.tools:
+                tool = chunk.tools[-1]
+                open_tools.append(tracer.start_span(TOOL_SPAN, span, agent=name, tool=tool.get("tool_name")))
+                yield PipelineEvent(TOOL_STARTED, name, tool.get("tool_name", ""))
+            elif event == _TOOL_CALL_COMPLETED and chunk.tools and open_tools:
+                # phi runs tool calls one at a time and swaps the last entry for the
+                # finished call. Gemini sets no tool_call_id, so match by position.
+                data = _tool_finished(chunk.tools[-1])
+                tracer.end_span(open_tools.pop(), "error" if data["error"] else "ok", bytes=data["bytes"])
+                yield PipelineEvent(TOOL_FINISHED, name, data["tool"], data["duration"], data)
+            elif event == _RUN_COMPLETED:
+                for data in _model_calls(chunk.messages):
+                    tracer.record(
+                        MODEL_SPAN, data["start_time"], data["duration"], span, agent=name,
+                        input_tokens=data["input_tokens"], output_tokens=data["output_tokens"],
+                    )
+                    yield PipelineEvent(MODEL_CALL, name, elapsed=data["duration"], data=data)
+    except GeneratorExit:
+        status = "cancelled"
+        raise
+    except Exception as e:
+        status, error = "error", str(e)
+        raise
+    finally:
+        for tool_span in open_tools:
+            tracer.end_span(tool_span, status)
+        attributes = {"error": error} if error else {}
+        tracer.end_span(span, status, **attributes)
+
+
+def _member_worker(member, events, cancelled, tracer, parent):
+    events.put(PipelineEvent(AGENT_STARTED, member.name))
+    start = time.perf_counter()
+    parts = []
+    run = stream_agent(member.agent, member.task, member.name, tracer, parent)
+    try:
+        for event in run:
+            if cancelled.is_set():
+                run.close()
+                return
+            if event.kind == AGENT_CHUNK:
+                parts.append(event.content)
+            events.put(event)
+    except Exception as e:
+        events.put(PipelineEvent(AGENT_FAILED, member.name, str(e), time.perf_counter() - start))
+        return
+    events.put(PipelineEvent(AGENT_FINISHED, member.name, "".join(parts), time.perf_counter() - start))
+
+
+def synthesis_prompt(company, outputs):
+    parts = [f"Company: {company}", ""]
+    for name, content in outputs.items():
+        parts.append(f"## Findings from the {name}")
+        parts.append(content if content else "NA (no information was returned)")
+        parts.append("")
+    return "\n".join(parts)
+
+
+def stream_fanout(members, synthesizer, company, tracer=None, cached=None):
+    """Run all members concurrently, each under its own timeout, then stream the merge.
+
+    cached maps member names to outputs kept from an earlier run; those members
+    are not run again but their outputs still go into the synthesis.
+    """
+    start = time.perf_counter()
+    cached = cached or {}
+    tracer = tracer or Tracer(company=company, mode="fanout")
+    root = tracer.start_span(PIPELINE_SPAN, reused=len(cached))
+    result = PipelineResult(report="", trace=tracer, reused=list(cached))
+    events = queue.Queue()
+    cancelled = threading.Event()
+    deadlines = {m.name: start + m.timeout for m in members}
+    for member in members:
+        threading.Thread(
+            target=_member_worker, args=(member, events, cancelled, tracer, root),
+            name=f"member-{member.name}", daemon=True,
+        ).start()
+    for name, content in cached.items():
+        result.outputs[name] = content
+        result.timings[name] = 0.0
+        yield PipelineEvent(AGENT_FINISHED, name, content, 0.0, {"cached": True})
+
+    pending = set(deadlines)
+    try:
+        while pending:
+            now = time.perf_counter()
+            for name in [n for n in pending if deadlines[n] <= now]:
+                # A thread cannot be killed; it stops at its next chunk instead
+                pending.discard(name)
+                result.outputs[name] = None
+                result.timings[name] = now - start
+                result.errors[name] = f"timed out after {now - start:.0f}s"
+                yield PipelineEvent(AGENT_FAILED, name, result.errors[name], result.timings[name])
+            if not pending:
+                break
+            try:
+                event = events.get(timeout=max(min(deadlines[n] for n in pending) - now, 0.01))
+            except queue.Empty:
+                continue
+            if event.agent not in pending:
+                continue
+            if event.kind == AGENT_CHUNK and result.first_byte_time is None:
+                result.first_byte_time = time.perf_counter() - start
+            if event.kind in (AGENT_FINISHED, AGENT_FAILED):
+                pending.discard(event.agent)
+                result.timings[event.agent] = event.elapsed
+                result.outputs[event.agent] = event.content if event.kind == AGENT_FINISHED else None
+                if event.kind == AGENT_FAILED:
+                    result.errors[event.agent] = event.content
+            yield event
+    finally:
+        cancelled.set()
+
+    # Keep the members' order in the synthesis prompt stable
+    result.outputs = {name: result.outputs.get(name) for name in [*cached, *(m.name for m in members)]}
+    if not any(result.outputs.values()):
+        tracer.end_span(root, "error")
+        raise RuntimeError("All research agents failed: " + "; ".join(f"{k}: {v}" for k, v in result.errors.items()))
+
+    synthesis_start = time.perf_counter()
+    parts = []
+    yield PipelineEvent(AGENT_STARTED, "Synthesis")
+    for event in stream_agent(synthesizer, synthesis_prompt(company, result.outputs), "Synthesis", tracer, root):
+        if event.kind == AGENT_CHUNK:
+            parts.append(event.content)
+            yield PipelineEvent(REPORT_CHUNK, "Synthesis", event.content)
+        else:
+            yield event
+    result.timings["Synthesis"] = time.perf_counter() - synthesis_start
+    yield PipelineEvent(AGENT_FINISHED, "Synthesis", elapsed=result.timings["Synthesis"])
+    result.report = "".join(parts)
+    result.wall_time = time.perf_counter() - start
+    tracer.end_span(root, first_byte_s=result.first_byte_time)
+    yield PipelineEvent(DONE, result=result)
+
+
+def _member_name_from_tool(tool_name, members):
+    # phi names team tools "transfer_task_to_<agent name in snake_case>"
+    for name in members:
+        if tool_name == "transfer_task_to_" + name.replace(" ", "_").lower():
+            return name
+    return None
+
+
+def stream_team(leader, company, tracer=None):
+    """Original sequential mode: the team leader delegates to members itself."""
+    start = time.perf_counter()
+    tracer = tracer or Tracer(company=company, mode="team")
+    root = tracer.start_span(PIPELINE_SPAN)
+    result = PipelineResult(report="", trace=tracer)
+    members = [m.name for m in (leader.team or []) if m.name]
+    parts = []
+    yield PipelineEvent(AGENT_STARTED, "Team leader")
+    for event in stream_agent(leader, company, "Team leader", tracer, root):
+        # Member runs are only visible as the leader's transfer tool calls
+        member = _member_name_from_tool(event.content, members) if event.kind in (TOOL_STARTED, TOOL_FINISHED) else None
+        if member and event.kind == TOOL_STARTED:
+            yield PipelineEvent(AGENT_STARTED, member)
+        elif member:
+            yield PipelineEvent(AGENT_FINISHED, member, elapsed=event.elapsed)
+        elif event.kind == AGENT_CHUNK:
+            if result.first_byte_time is None:
+                result.first_byte_time = time.perf_counter() - start
+            parts.append(event.content)
+            yield PipelineEvent(REPORT_CHUNK, "Team leader", event.content)
+        else:
+            yield event
+    result.report = "".join(parts)
+    result.timings["Team leader"] = time.perf_counter() - start
+    result.wall_time = result.timings["Team leader"]
+    tracer.end_span(root, first_byte_s=result.first_byte_time)
+    yield PipelineEvent(AGENT_FINISHED, "Team leader", elapsed=result.wall_time)
+    yield PipelineEvent(DONE, result=result)
+
+
+def drain(events):
+    for event in events:
+        if event.kind == DONE:
+            return event.result
+    raise RuntimeError("Pipeline ended without a result")
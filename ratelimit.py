@@ -0,0 +1,252 @@
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Process-wide request scheduler shared by every research run (UI sessions and
+# the batch CLI). Each (provider, API key) pair gets a token bucket; callers
+# queue per session and are served round-robin, so one big report cannot
+# starve another user's. Failed calls that look like quota or transient errors
+# are retried with jittered exponential backoff, and a quota error (429) also
+# empties the bucket so everyone sharing that key slows down instead of failing.
+# A key's schedulers are dropped once it has been idle for SCHEDULER_IDLE_TTL.
+#
+# Limits are requests per minute, overridable with COMPANYPREP_<PROVIDER>_RPM
+# (e.g. COMPANYPREP_GEMINI_RPM=10); 0 means unlimited. The Gemini limit
+# applies per API key, tool limits per provider.
+
+DEFAULT_RPM = {
+    "gemini": 15,
+    "duckduckgo": 30,
+    "yfinance": 60,
+    "youtube": 60,
+    "articles": 0,
+}
+MAX_RETRIES = int(os.environ.get("COMPANYPREP_MAX_RETRIES", "4"))
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+SCHEDULER_IDLE_TTL = 3600
+
+# Exception names/messages worth retrying (quota, overload, timeouts)
+_RETRYABLE = ("resourceexhausted", "toomanyrequests", "ratelimit", "429", "serviceunavailable", "503",
+              "deadlineexceeded", "internalservererror", "timeout", "connectionerror")
+_QUOTA = ("resourceexhausted", "toomanyrequests", "ratelimit", "429", "quota")
+
+
+class RateLimitError(Exception):
+    """A call still failed after MAX_RETRIES attempts because of quota or overload."""
+
+    def __init__(self, provider, error):
+        super().__init__(f"{provider} is rate limited or overloaded, gave up after {MAX_RETRIES} retries: {error}")
+        self.provider = provider
+        self.error = error
+
+
+def _matches(error, words):
+    text = f"{type(error).__name__} {error}".lower()
+    return any(word in text for word in words)
+
+
+def is_retryable(error):
+    return _matches(error, _RETRYABLE)
+
+
+def backoff(attempt):
+    """Exponential backoff with full jitter, in seconds."""
+    return random.uniform(0.5, 1.5) * min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        # Default burst: ten seconds' worth of requests, at least one
+        self.capacity = float(burst or max(1, per_minute // 6))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Take a token if one is available; otherwise return the seconds until one is."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self):
+        self.tokens = 0.0
+
+
+class Scheduler:
+    """Fair (round-robin per session) admission to one provider/key's token bucket."""
+
+    def __init__(self, provider, key, per_minute, burst=None):
+        self.provider = provider
+        self.key = key
+        self.per_minute = per_minute
+        self.bucket = TokenBucket(per_minute, burst) if per_minute else None
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_used = time.monotonic()
+
+    @property
+    def depth(self):
+        return sum(len(q) for q in self._queues.values())
+
+    def acquire(self, session=None):
+        """Block until this session's turn and a token are both available; returns the wait."""
+        start = time.monotonic()
+        ticket = object()
+        with self._cond:
+            self._queues.setdefault(session, deque()).append(ticket)
+            self.max_depth = max(self.max_depth, self.depth)
+            while True:
+                head = next(iter(self._queues))
+                if self._queues[head][0] is ticket:
+                    delay = self.bucket.take() if self.bucket else 0.0
+                    if not delay:
+                        break
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+            self._queues[head].popleft()
+            if self._queues[head]:
+                # Other sessions go before this one's next request
+                self._queues.move_to_end(head)
+            else:
+                del self._queues[head]
+            waited = time.monotonic() - start
+            self.requests += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.last_used = time.monotonic()
+            self._cond.notify_all()
+        return waited
+
+    def throttled(self, quota=False):
+        with self._cond:
+            self.retries += 1
+            # Timeouts and 503s only back off this caller; a quota error slows the whole key
+            if quota and self.bucket:
+                self.bucket.drain()
+
+    def idle(self, now):
+        with self._cond:
+            return not self._queues and now - self.last_used > SCHEDULER_IDLE_TTL
+
+    def failed(self):
+        with self._cond:
+            self.failures += 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "provider": self.provider,
+                "key": "…" + self.key[-4:] if self.key else "",
+                "limit_rpm": self.per_minute or None,
+                "queued": self.depth,
+                "max_queued": self.max_depth,
+                "requests": self.requests,
+                "avg_wait_s": self.total_wait / self.requests if self.requests else 0.0,
+                "max_wait_s": self.max_wait,
+                "retries": self.retries,
+                "failures": self.failures,
+            }
+
+
+def _env_limit(provider):
+    value = os.environ.get(f"COMPANYPREP_{provider.upper()}_RPM", "")
+    return float(value) if value else DEFAULT_RPM.get(provider, 0)
+
+
+_limits = {}
+_schedulers = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def configure(provider, per_minute, burst=None):
+    """Set (or with per_minute=None/0, remove) the limit for a provider, for all keys."""
+    with _lock:
+        _limits[provider] = (per_minute or 0, burst)
+        for name in [n for n in _schedulers if n[0] == provider]:
+            del _schedulers[name]
+
+
+def get_scheduler(provider, key=None):
+    with _lock:
+        name = (provider, key)
+        if name not in _schedulers:
+            # Keys come from users, so drop the ones nobody has used for a while
+            now = time.monotonic()
+            for old in [n for n, s in _schedulers.items() if n[1] is not None and s.idle(now)]:
+                del _schedulers[old]
+            per_minute, burst = _limits.get(provider, (_env_limit(provider), None))
+            _schedulers[name] = Scheduler(provider, key, per_minute, burst)
+        return _schedulers[name]
+
+
+def set_session(session):
+    """Attribute this thread's following requests to a session (one research run)."""
+    _local.session = session
+
+
+def current_session():
+    return getattr(_local, "session", None)
+
+
+def acquire(provider, key=None, session=None):
+    return get_scheduler(provider, key).acquire(session or current_session())
+
+
+def call(provider, fn, key=None, session=None):
+    """Run fn under the provider's limit, retrying quota/transient errors with backoff."""
+    scheduler = get_scheduler(provider, key)
+    for attempt in range(MAX_RETRIES + 1):
+        scheduler.acquire(session or current_session())
+        try:
+            return fn()
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            if attempt == MAX_RETRIES:
+                scheduler.failed()
+                raise RateLimitError(provider, e) if _matches(e, _QUOTA) else e
+            scheduler.throttled(_matches(e, _QUOTA))
+            time.sleep(backoff(attempt))
+
+
+def call_stream(provider, fn, key=None, session=None):
+    """Like call() for streaming responses; only retried if nothing was received yet."""
+    scheduler = get_scheduler(provider, key)
+    for attempt in range(MAX_RETRIES + 1):
+        scheduler.acquire(session or current_session())
+        received = False
+        try:
+            for item in fn():
+                received = True
+                yield item
+            return
+        except Exception as e:
+            if received or not is_retryable(e):
+                raise
+            if attempt == MAX_RETRIES:
+                scheduler.failed()
+                raise RateLimitError(provider, e) if _matches(e, _QUOTA) else e
+            scheduler.throttled(_matches(e, _QUOTA))
+            time.sleep(backoff(attempt))
+
+
+def scheduler_stats(key=None):
+    """Stats of the shared tool providers and of one API key's schedulers (never other keys')."""
+    with _lock:
+        schedulers = [s for s in _schedulers.values() if s.key is None or s.key == key]
+    return [s.stats() for s in schedulers]
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# On-disk cache for generated research so repeat lookups skip the agent run.
+# Entries are keyed by normalized company, tier (basic/pro), a hash of the
+# agent instructions (so editing a prompt invalidates old reports) and section.
+
+CACHE_DIR = os.environ.get("COMPANYPREP_CACHE_DIR", ".companyprep_cache")
+CACHE_PATH = os.path.join(CACHE_DIR, "reports.sqlite3")
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# Default time-to-live per section, in seconds
+SECTION_TTLS = {
+    "report": 6 * HOUR,
+    "stock": 5 * MINUTE,
+    "overview": DAY,
+    "financials": HOUR,
+    "research": 6 * HOUR,
+    "videos": 7 * DAY,
+}
+DEFAULT_TTL = HOUR
+# Sections that change too quickly for a longer override (e.g. batch --ttl-hours) to apply
+VOLATILE_SECTIONS = ("stock", "financials")
+# Expired entries are deleted at most this often, on a write
+PURGE_INTERVAL = HOUR
+
+_COMPANY_SUFFIXES = {"inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "llc", "plc", "pvt", "private"}
+
+
+def section_ttl(section, ttl=None):
+    """Lifetime of a section; ttl replaces the default but never extends a volatile section."""
+    default = SECTION_TTLS.get(section, DEFAULT_TTL)
+    if ttl is None:
+        return default
+    return min(ttl, default) if section in VOLATILE_SECTIONS else ttl
+
+
+def normalize_company(name):
+    words = re.sub(r"[^\w\s&]", " ", name.casefold()).split()
+    while len(words) > 1 and words[-1] in _COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def prompt_hash(*parts):
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ReportCache:
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    company TEXT NOT NULL,
+                    tier TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    section TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    meta TEXT,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (company, tier, prompt_version, section)
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS stats (
+                    tier TEXT NOT NULL,
+                    section TEXT NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (tier, section)
+                )"""
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, conn, tier, section, hit):
+        column = "hits" if hit else "misses"
+        conn.execute("INSERT OR IGNORE INTO stats (tier, section) VALUES (?, ?)", (tier, section))
+        conn.execute(f"UPDATE stats SET {column} = {column} + 1 WHERE tier = ? AND section = ?", (tier, section))
+
+    def get(self, company, tier, prompt_version, section="report"):
+        """Return the cached entry as a dict, or None if missing or expired."""
+        key = (normalize_company(company), tier, prompt_version, section)
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT content, meta, created_at, expires_at FROM entries "
+                "WHERE company = ? AND tier = ? AND prompt_version = ? AND section = ?",
+                key,
+            ).fetchone()
+            hit = row is not None and row[3] > time.time()
+            self._count(conn, tier, section, hit)
+        if not hit:
+            return None
+        content, meta, created_at, expires_at = row
+        return {
+            "content": content,
+            "meta": json.loads(meta) if meta else {},
+            "created_at": created_at,
+            "expires_at": expires_at,
+        }
+
+    def put(self, company, tier, prompt_version, section, content, ttl=None, meta=None):
+        if ttl is None:
+            ttl = SECTION_TTLS.get(section, DEFAULT_TTL)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_company(company), tier, prompt_version, section, content,
+                    json.dumps(meta) if meta else None, now, now + ttl,
+                ),
+            )
+        if now - self._purged_at > PURGE_INTERVAL:
+            self.purge_expired()
+
+    def purge_expired(self):
+        """Delete expired entries (including those of old prompt versions); returns how many."""
+        with self._lock, self._connect() as conn:
+            self._purged_at = time.time()
+            return conn.execute("DELETE FROM entries WHERE expires_at <= ?", (self._purged_at,)).rowcount
+
+    def stats(self, tier=None):
+        """Return hit/miss counters, optionally limited to one tier."""
+        query = "SELECT tier, section, hits, misses FROM stats"
+        params = []
+        if tier is not None:
+            query += " WHERE tier = ?"
+            params.append(tier)
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+            entries = conn.execute("SELECT COUNT(*) FROM entries WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+        hits = sum(r[2] for r in rows)
+        misses = sum(r[3] for r in rows)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": entries,
+            "sections": {(r[0], r[1]): {"hits": r[2], "misses": r[3]} for r in rows},
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReportCache()
+        return _cache
@@ -0,0 +1,147 @@
+import importlib
+import os
+import sys
+import threading
+import time
+
+from tracing import Tracer
+
+# Cold start, rerun timing and background warm-up for the Streamlit app.
+#
+# Streamlit runs CompanyPrep.py again on every interaction, so the page only
+# imports light modules; the agent stack (phi, Gemini, yfinance, newspaper,
+# DuckDuckGo, YouTube) is imported when a button first needs it. After the
+# first render a daemon thread imports it ahead of time and opens the local
+# caches (purging expired rows) and the pooled HTTP session, so that first
+# press does not pay for it either. No network requests are made.
+# COMPANYPREP_WARMUP=0 turns it off.
+#
+# Render times are kept per process and written as "app.render" spans.
+#
+#   python startup.py --reruns 5   # cold start and rerun times of the landing page
+
+WARMUP_ENABLED = os.environ.get("COMPANYPREP_WARMUP", "1") != "0"
+# Imported by the warm-up, in this order
+WARMUP_MODULES = ("agents", "phi.tools.yfinance", "phi.tools.youtube_tools", "fetch", "yfinance", "youtube_transcript_api")
+# The landing page must not import any of these
+HEAVY_MODULES = ("phi.agent", "phi.model.google", "yfinance", "pandas", "newspaper", "duckduckgo_search", "youtube_transcript_api")
+
+# Span names
+RENDER_SPAN = "app.render"
+WARMUP_SPAN = "app.warmup"
+
+_lock = threading.Lock()
+_renders = {"count": 0, "first_s": None, "last_s": None, "rerun_total_s": 0.0}
+_warmup = {"status": "off" if not WARMUP_ENABLED else "idle", "elapsed_s": None, "imports": {}, "error": None}
+
+
+def record_render(started, wall_started):
+    """Record one script run that began at perf_counter() started / time.time() wall_started."""
+    elapsed = time.perf_counter() - started
+    with _lock:
+        _renders["count"] += 1
+        first = _renders["first_s"] is None
+        if first:
+            _renders["first_s"] = elapsed
+        else:
+            _renders["rerun_total_s"] += elapsed
+        _renders["last_s"] = elapsed
+    Tracer(app="CompanyPrep").record(RENDER_SPAN, wall_started, elapsed, cold=first)
+    return render_stats()
+
+
+def render_stats():
+    with _lock:
+        reruns = _renders["count"] - 1
+        return {
+            "count": _renders["count"],
+            "first_s": _renders["first_s"],
+            "last_s": _renders["last_s"],
+            "reruns": max(reruns, 0),
+            "rerun_avg_s": _renders["rerun_total_s"] / reruns if reruns > 0 else None,
+        }
+
+
+def _warm():
+    wall_start, start = time.time(), time.perf_counter()
+    status = "ok"
+    try:
+        for name in WARMUP_MODULES:
+            module_start = time.perf_counter()
+            importlib.import_module(name)
+            with _lock:
+                _warmup["imports"][name] = time.perf_counter() - module_start
+        import agents
+        import fetch
+        import transcripts
+        from report_cache import get_cache
+
+        # SQLite caches (created and migrated on first open, expired rows purged),
+        # a toolkit and the HTTP pool
+        get_cache().purge_expired()
+        fetch.get_fetch_cache().purge_expired()
+        transcripts.get_store()
+        fetch.get_session()
+        agents.new_toolkit("search")
+    except Exception as e:
+        # A failed warm-up only means the first button press loads the rest itself
+        status = "error"
+        with _lock:
+            _warmup["error"] = str(e)
+    elapsed = time.perf_counter() - start
+    with _lock:
+        _warmup.update(status="ready" if status == "ok" else "failed", elapsed_s=elapsed)
+    Tracer(app="CompanyPrep").record(WARMUP_SPAN, wall_start, elapsed, status=status)
+
+
+def start_warmup():
+    """Start the warm-up thread once per process; False if it is disabled or already started."""
+    with _lock:
+        if _warmup["status"] != "idle":
+            return False
+        _warmup["status"] = "warming"
+    threading.Thread(target=_warm, name="warmup", daemon=True).start()
+    return True
+
+
+def warmup_status():
+    with _lock:
+        return {**_warmup, "imports": dict(_warmup["imports"])}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure the landing page's cold start and rerun time.")
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--app", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "CompanyPrep.py"))
+    args = parser.parse_args(argv)
+
+    # Measure the page alone; the warm-up would import the agent stack behind it
+    os.environ["COMPANYPREP_WARMUP"] = "0"
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    streamlit_s = time.perf_counter() - start
+    app = AppTest.from_file(args.app, default_timeout=60)
+    timings = []
+    for _ in range(args.reruns + 1):
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+        if app.exception:
+            raise SystemExit(f"The app raised: {app.exception[0].message}")
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    print(f"streamlit import   {streamlit_s * 1000:7.0f} ms")
+    print(f"cold start         {timings[0] * 1000:7.0f} ms")
+    if args.reruns:
+        reruns = sorted(timings[1:])
+        print(f"rerun p50          {reruns[len(reruns) // 2] * 1000:7.0f} ms")
+        print(f"rerun max          {reruns[-1] * 1000:7.0f} ms")
+    print(f"heavy imports      {', '.join(heavy) or 'none'}")
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+import csv
+import difflib
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from ratelimit import acquire
+from report_cache import normalize_company
+
+# Deterministic company name -> ticker lookup for the "Get Live Stock Price"
+# button, so common placement companies skip the LLM + web search loop and go
+# straight to yfinance. Indian listings use their NSE symbol (".NS").
+# Extra rows can be supplied as a "company,symbol" CSV via COMPANYPREP_TICKERS_FILE.
+
+TICKERS_FILE = os.environ.get("COMPANYPREP_TICKERS_FILE", "")
+QUOTE_TTL = int(os.environ.get("COMPANYPREP_QUOTE_TTL", "60"))
+FUZZY_CUTOFF = 0.85
+
+TICKERS = {
+    # Indian IT services and product companies
+    "tata consultancy services": "TCS.NS", "tcs": "TCS.NS",
+    "infosys": "INFY.NS",
+    "wipro": "WIPRO.NS",
+    "hcl technologies": "HCLTECH.NS", "hcl": "HCLTECH.NS", "hcltech": "HCLTECH.NS",
+    "tech mahindra": "TECHM.NS",
+    "ltimindtree": "LTIM.NS", "lti mindtree": "LTIM.NS",
+    "l&t technology services": "LTTS.NS", "ltts": "LTTS.NS",
+    "larsen & toubro": "LT.NS", "larsen and toubro": "LT.NS", "l&t": "LT.NS",
+    "mphasis": "MPHASIS.NS",
+    "persistent systems": "PERSISTENT.NS",
+    "coforge": "COFORGE.NS",
+    "zensar technologies": "ZENSARTECH.NS",
+    "cyient": "CYIENT.NS",
+    "kpit technologies": "KPITTECH.NS",
+    "tata elxsi": "TATAELXSI.NS",
+    "oracle financial services software": "OFSS.NS",
+    "sonata software": "SONATSOFTW.NS",
+    "birlasoft": "BSOFT.NS",
+    "mastek": "MASTEK.NS",
+    "happiest minds": "HAPPSTMNDS.NS",
+    # Indian conglomerates, banks and consumer companies
+    "reliance industries": "RELIANCE.NS", "reliance": "RELIANCE.NS",
+    "hdfc bank": "HDFCBANK.NS",
+    "icici bank": "ICICIBANK.NS",
+    "state bank of india": "SBIN.NS", "sbi": "SBIN.NS",
+    "axis bank": "AXISBANK.NS",
+    "kotak mahindra bank": "KOTAKBANK.NS",
+    "bajaj finance": "BAJFINANCE.NS",
+    "bharti airtel": "BHARTIARTL.NS", "airtel": "BHARTIARTL.NS",
+    "tata motors": "TATAMOTORS.NS",
+    "tata steel": "TATASTEEL.NS",
+    "mahindra & mahindra": "M&M.NS", "mahindra and mahindra": "M&M.NS",
+    "maruti suzuki": "MARUTI.NS",
+    "ashok leyland": "ASHOKLEY.NS",
+    "hindustan unilever": "HINDUNILVR.NS",
+    "itc": "ITC.NS",
+    "asian paints": "ASIANPAINT.NS",
+    "nestle india": "NESTLEIND.NS",
+    "sun pharmaceutical": "SUNPHARMA.NS", "sun pharma": "SUNPHARMA.NS",
+    "dr reddy s laboratories": "DRREDDY.NS", "dr reddys": "DRREDDY.NS",
+    "cipla": "CIPLA.NS",
+    "bosch india": "BOSCHLTD.NS",
+    "paytm": "PAYTM.NS", "one97 communications": "PAYTM.NS",
+    "zomato": "ETERNAL.NS", "eternal": "ETERNAL.NS",
+    "swiggy": "SWIGGY.NS",
+    "nykaa": "NYKAA.NS",
+    # Global technology companies
+    "alphabet": "GOOGL", "google": "GOOGL",
+    "microsoft": "MSFT",
+    "amazon": "AMZN",
+    "apple": "AAPL",
+    "meta platforms": "META", "meta": "META", "facebook": "META",
+    "netflix": "NFLX",
+    "nvidia": "NVDA",
+    "intel": "INTC",
+    "advanced micro devices": "AMD", "amd": "AMD",
+    "qualcomm": "QCOM",
+    "texas instruments": "TXN",
+    "micron technology": "MU", "micron": "MU",
+    "broadcom": "AVGO",
+    "applied materials": "AMAT",
+    "synopsys": "SNPS",
+    "cadence design systems": "CDNS", "cadence": "CDNS",
+    "arm holdings": "ARM",
+    "cisco": "CSCO", "cisco systems": "CSCO",
+    "oracle": "ORCL",
+    "ibm": "IBM", "international business machines": "IBM",
+    "sap": "SAP",
+    "adobe": "ADBE",
+    "salesforce": "CRM",
+    "servicenow": "NOW",
+    "workday": "WDAY",
+    "intuit": "INTU",
+    "atlassian": "TEAM",
+    "shopify": "SHOP",
+    "spotify": "SPOT",
+    "uber": "UBER", "uber technologies": "UBER",
+    "paypal": "PYPL",
+    "dell technologies": "DELL", "dell": "DELL",
+    "hp": "HPQ",
+    "hewlett packard enterprise": "HPE",
+    "freshworks": "FRSH",
+    "accenture": "ACN",
+    "cognizant": "CTSH", "cognizant technology solutions": "CTSH",
+    "capgemini": "CAP.PA",
+    "epam systems": "EPAM",
+    "globant": "GLOB",
+    "samsung electronics": "005930.KS", "samsung": "005930.KS",
+    "sony": "SONY",
+    "tesla": "TSLA",
+    # Finance, industrial and consumer companies
+    "goldman sachs": "GS",
+    "jpmorgan chase": "JPM", "jpmorgan": "JPM", "jp morgan": "JPM",
+    "morgan stanley": "MS",
+    "citigroup": "C", "citi": "C",
+    "bank of america": "BAC",
+    "wells fargo": "WFC",
+    "barclays": "BCS",
+    "hsbc": "HSBC",
+    "deutsche bank": "DB",
+    "ubs": "UBS",
+    "american express": "AXP",
+    "visa": "V",
+    "mastercard": "MA",
+    "walmart": "WMT",
+    "siemens": "SIE.DE",
+    "honeywell": "HON",
+    "general electric": "GE", "ge": "GE",
+    "boeing": "BA",
+    "toyota": "TM",
+    "unilever": "UL",
+    "procter & gamble": "PG", "procter and gamble": "PG",
+    "johnson & johnson": "JNJ", "johnson and johnson": "JNJ",
+    "pfizer": "PFE",
+    # Well-known recruiters that are not publicly listed
+    "zoho": None,
+    "deloitte": None,
+    "pwc": None, "pricewaterhousecoopers": None,
+    "kpmg": None,
+    "ey": None, "ernst & young": None,
+    "flipkart": None,
+    "mu sigma": None,
+    "razorpay": None,
+    "byju s": None,
+}
+
+
+@dataclass
+class TickerMatch:
+    company: str
+    symbol: str
+    matched_name: str
+    exact: bool
+
+
+def _load_extra_tickers():
+    if not TICKERS_FILE or not os.path.exists(TICKERS_FILE):
+        return {}
+    with open(TICKERS_FILE, newline="", encoding="utf-8") as f:
+        return {normalize_company(row[0]): (row[1].strip() or None) for row in csv.reader(f) if len(row) >= 2}
+
+
+_index = {**TICKERS, **_load_extra_tickers()}
+_symbols = {s for s in _index.values() if s}
+
+
+def resolve_ticker(company):
+    """Resolve a company name (or a ticker typed directly) without any network call.
+
+    Returns a TickerMatch, whose symbol is None for known unlisted companies,
+    or None when the name is not in the index.
+    """
+    typed = company.strip()
+    if typed.isupper() and typed in _symbols:
+        return TickerMatch(company, typed, typed, True)
+    name = normalize_company(company)
+    if name in _index:
+        return TickerMatch(company, _index[name], name, True)
+    close = difflib.get_close_matches(name, _index.keys(), n=1, cutoff=FUZZY_CUTOFF)
+    if close:
+        return TickerMatch(company, _index[close[0]], close[0], False)
+    return None
+
+
+_quotes = {}
+_quotes_lock = threading.Lock()
+
+
+def get_quote(symbol, refresh=False):
+    """Latest quote for a symbol straight from yfinance, cached for QUOTE_TTL seconds."""
+    now = time.time()
+    with _quotes_lock:
+        cached = _quotes.get(symbol)
+    if cached and not refresh and now - cached["fetched_at"] < QUOTE_TTL:
+        return {**cached, "cached": True}
+
+    # yfinance pulls in pandas; only load it once a quote is actually needed
+    import yfinance as yf
+
+    acquire("yfinance")
+    info = yf.Ticker(symbol).fast_info
+    price = info.last_price
+    if price is None:
+        raise ValueError(f"No price data for {symbol}")
+    previous_close = info.previous_close
+    quote = {
+        "symbol": symbol,
+        "price": price,
+        "currency": info.currency,
+        "previous_close": previous_close,
+        "change": price - previous_close if previous_close else None,
+        "change_pct": (price - previous_close) / previous_close * 100 if previous_close else None,
+        "day_high": info.day_high,
+        "day_low": info.day_low,
+        "year_high": info.year_high,
+        "year_low": info.year_low,
+        "market_cap": info.market_cap,
+        "fetched_at": time.time(),
+    }
+    with _quotes_lock:
+        _quotes[symbol] = quote
+    return {**quote, "cached": False}
+
+
+def _fmt(value, digits=2):
+    return "NA" if value is None else f"{value:,.{digits}f}"
+
+
+def format_quote(company, quote):
+    currency = quote["currency"] or ""
+    change = "NA"
+    if quote["change"] is not None:
+        change = f"{quote['change']:+,.2f} ({quote['change_pct']:+.2f}%)"
+    rows = [
+        ("Price", f"{_fmt(quote['price'])} {currency}"),
+        ("Change", change),
+        ("Previous close", _fmt(quote["previous_close"])),
+        ("Day range", f"{_fmt(quote['day_low'])} – {_fmt(quote['day_high'])}"),
+        ("52-week range", f"{_fmt(quote['year_low'])} – {_fmt(quote['year_high'])}"),
+        ("Market cap", f"{_fmt(quote['market_cap'], 0)} {currency}"),
+    ]
+    lines = [f"**{company}** (`{quote['symbol']}`)", "", "| Metric | Value |", "| --- | --- |"]
+    lines += [f"| {name} | {value} |" for name, value in rows]
+    return "\n".join(lines)
+
+
+# Currency by exchange suffix, for the comparison table (yf.download does not return it)
+_SUFFIX_CURRENCIES = {".NS": "INR", ".BO": "INR", ".PA": "EUR", ".DE": "EUR", ".KS": "KRW"}
+# Trading days back for the comparison returns
+_PERIODS = (("1M", 21), ("6M", 126))
+
+
+def _currency(symbol):
+    return next((c for suffix, c in _SUFFIX_CURRENCIES.items() if symbol.endswith(suffix)), "USD")
+
+
+def _closes(history, symbol):
+    try:
+        closes = history[symbol]["Close"] if history.columns.nlevels > 1 else history["Close"]
+    except KeyError:
+        return None
+    closes = closes.dropna()
+    return closes if len(closes) else None
+
+
+def _pct(closes, days):
+    if closes is None or len(closes) <= days:
+        return "NA"
+    return f"{(closes.iloc[-1] / closes.iloc[-days - 1] - 1) * 100:+.1f}%"
+
+
+def compare_quotes(companies):
+    """Markdown table comparing several companies, from one batched yfinance download."""
+    matches = {company: resolve_ticker(company) for company in companies}
+    symbols = sorted({m.symbol for m in matches.values() if m and m.symbol})
+    history = None
+    if symbols:
+        import yfinance as yf
+
+        acquire("yfinance")
+        history = yf.download(symbols, period="1y", group_by="ticker", auto_adjust=True, progress=False, threads=True)
+        if history is None or history.empty:
+            history = None
+
+    lines = [
+        "| Company | Ticker | Last close | 1M | 6M | 1Y | 52-week range |",
+        "| --- | --- | --- | --- | --- | --- | --- |",
+    ]
+    for company, match in matches.items():
+        if match is None:
+            lines.append(f"| {company} | unknown | NA | NA | NA | NA | NA |")
+            continue
+        if not match.symbol:
+            lines.append(f"| {company} | not listed | NA | NA | NA | NA | NA |")
+            continue
+        closes = _closes(history, match.symbol) if history is not None else None
+        if closes is None:
+            lines.append(f"| {company} | {match.symbol} | NA | NA | NA | NA | NA |")
+            continue
+        currency = _currency(match.symbol)
+        returns = [_pct(closes, days) for _, days in _PERIODS] + [_pct(closes, len(closes) - 1)]
+        lines.append(
+            f"| {company} | {match.symbol} | {_fmt(closes.iloc[-1])} {currency} | {' | '.join(returns)} "
+            f"| {_fmt(closes.min())} – {_fmt(closes.max())} |"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+
+from report_cache import CACHE_DIR
+
+# Lightweight, OpenTelemetry-shaped tracing for the research pipeline.
+# Every agent run, tool call and model call becomes a span with wall time,
+# token counts and bytes fetched. Finished spans are appended to a JSONL file
+# (one span per line) and handed to any listener, e.g. the Streamlit UI.
+
+TRACE_FILE = os.environ.get("COMPANYPREP_TRACE_FILE", os.path.join(CACHE_DIR, "traces.jsonl"))
+
+# Span names
+PIPELINE_SPAN = "pipeline.run"
+AGENT_SPAN = "agent.run"
+TOOL_SPAN = "tool.call"
+MODEL_SPAN = "model.call"
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_span_id: str
+    name: str
+    start_time: float
+    end_time: float = None
+    status: str = "ok"
+    attributes: dict = field(default_factory=dict)
+
+    @property
+    def duration(self):
+        return (self.end_time or time.time()) - self.start_time
+
+    def to_dict(self):
+        data = asdict(self)
+        data["duration_s"] = round(self.duration, 4)
+        return data
+
+
+class JsonlSink:
+    def __init__(self, path=TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+_default_sink = None
+_sink_lock = threading.Lock()
+
+
+def default_sink():
+    """The process-wide JSONL sink, or None when COMPANYPREP_TRACE_FILE is empty."""
+    global _default_sink
+    if not TRACE_FILE:
+        return None
+    with _sink_lock:
+        if _default_sink is None:
+            _default_sink = JsonlSink()
+        return _default_sink
+
+
+class Tracer:
+    def __init__(self, sinks=None, **attributes):
+        self.trace_id = uuid.uuid4().hex
+        self.attributes = attributes
+        self.sinks = [s for s in (sinks if sinks is not None else [default_sink()]) if s is not None]
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def start_span(self, name, parent=None, **attributes):
+        return Span(
+            trace_id=self.trace_id,
+            span_id=uuid.uuid4().hex[:16],
+            parent_span_id=parent.span_id if parent else None,
+            name=name,
+            start_time=time.time(),
+            attributes={**self.attributes, **attributes},
+        )
+
+    def end_span(self, span, status="ok", **attributes):
+        span.end_time = time.time()
+        span.status = status
+        span.attributes.update(attributes)
+        return self._finish(span)
+
+    def record(self, name, start_time, duration, parent=None, status="ok", **attributes):
+        """Add a span that has already finished (e.g. a model call read from run metrics)."""
+        span = self.start_span(name, parent, **attributes)
+        span.start_time = start_time
+        span.end_time = start_time + duration
+        span.status = status
+        return self._finish(span)
+
+    def _finish(self, span):
+        with self._lock:
+            self.spans.append(span)
+        for sink in self.sinks:
+            try:
+                sink(span)
+            except Exception:
+                # Tracing must never break a report
+                pass
+        return span
+
+    def summary(self):
+        """Per-agent totals: wall time, model/tool calls, tokens and bytes."""
+        rows = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            agent = span.attributes.get("agent")
+            if agent is None or span.name == PIPELINE_SPAN:
+                continue
+            row = rows.setdefault(agent, {
+                "time_s": 0.0, "model_calls": 0, "tool_calls": 0,
+                "input_tokens": 0, "output_tokens": 0, "bytes": 0, "status": "ok",
+            })
+            if span.name == AGENT_SPAN:
+                row["time_s"] = span.duration
+                row["status"] = span.status if span.status == "ok" else span.attributes.get("error", span.status)
+            elif span.name == MODEL_SPAN:
+                row["model_calls"] += 1
+                row["input_tokens"] += span.attributes.get("input_tokens", 0)
+                row["output_tokens"] += span.attributes.get("output_tokens", 0)
+            elif span.name == TOOL_SPAN:
+                row["tool_calls"] += 1
+                row["bytes"] += span.attributes.get("bytes", 0)
+        return rows
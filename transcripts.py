@@ -0,0 +1,269 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from phi.run.response import RunResponse
+
+from ratelimit import acquire
+from report_cache import CACHE_DIR, DAY
+
+# Videos section of the Pro report. Instead of an LLM agent that searches,
+# pulls captions and "watches" each video one at a time on every request:
+#   1. one cached DuckDuckGo video search finds the company's YouTube videos
+#   2. transcripts are stored locally by video id (they practically never change)
+#   3. each transcript is split into chunks that are summarized in parallel,
+#      and the per-video summary is stored under the summary prompt version
+# Repeat requests, even for other companies sharing a video, reuse all of it.
+# VideoResearcher streams phi-style run events, so the pipeline treats it
+# like any other member agent. The fetch layer and the transcript client are
+# imported on first use, so importing this module stays cheap.
+
+TRANSCRIPTS_PATH = os.path.join(CACHE_DIR, "transcripts.sqlite3")
+
+MAX_VIDEOS = 4
+CHUNK_CHARS = 8000
+MAX_CHUNKS = 6
+SUMMARY_WORKERS = 6
+LANGUAGES = ("en", "en-IN", "en-US", "en-GB", "hi")
+# Videos without captions are checked again after this long
+NO_CAPTIONS_RETRY = DAY
+
+_VIDEO_ID = re.compile(r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)([\w-]{11})")
+
+
+def video_id(url):
+    match = _VIDEO_ID.search(url or "")
+    return match.group(1) if match else None
+
+
+def video_url(vid):
+    return f"https://www.youtube.com/watch?v={vid}"
+
+
+class TranscriptStore:
+    def __init__(self, path=TRANSCRIPTS_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS transcripts (
+                    video_id TEXT PRIMARY KEY,
+                    title TEXT,
+                    transcript TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS summaries (
+                    video_id TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, version)
+                )"""
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_transcript(self, vid):
+        """The stored transcript ("" when the video has no captions), or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT transcript, fetched_at FROM transcripts WHERE video_id = ?", (vid,)).fetchone()
+        if row is None or (not row[0] and time.time() - row[1] > NO_CAPTIONS_RETRY):
+            return None
+        return row[0]
+
+    def put_transcript(self, vid, title, transcript):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?)", (vid, title, transcript, time.time()))
+
+    def get_summary(self, vid, version):
+        with self._connect() as conn:
+            row = conn.execute("SELECT summary FROM summaries WHERE video_id = ? AND version = ?", (vid, version)).fetchone()
+        return row[0] if row else None
+
+    def put_summary(self, vid, version, summary):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)", (vid, version, summary, time.time()))
+
+
+_store = None
+_store_lock = threading.Lock()
+# Chunk summaries from every session share one pool; the Gemini scheduler
+# still decides when each request actually goes out
+_chunk_pool = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="video-chunk")
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TranscriptStore()
+        return _store
+
+
+def find_videos(company, max_results=MAX_VIDEOS):
+    """Distinct YouTube videos about a company, from the shared (cached) video search."""
+    from fetch import search
+
+    results = json.loads(search(f"{company} company", max_results=max_results * 3, kind="videos"))
+    videos = {}
+    for result in results:
+        vid = video_id(result.get("content", ""))
+        if vid and vid not in videos:
+            videos[vid] = {
+                "id": vid,
+                "title": result.get("title") or vid,
+                "publisher": result.get("publisher") or result.get("uploader") or "",
+                "duration": result.get("duration") or "",
+                "description": result.get("description") or "",
+            }
+    return list(videos.values())[:max_results]
+
+
+def get_transcript(video):
+    from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled, YouTubeTranscriptApi
+
+    from fetch import get_session
+
+    store = get_store()
+    transcript = store.get_transcript(video["id"])
+    if transcript is not None:
+        return transcript, True
+    acquire("youtube")
+    try:
+        fetched = YouTubeTranscriptApi(http_client=get_session()).fetch(video["id"], languages=LANGUAGES)
+        transcript = " ".join(snippet.text.replace("\n", " ") for snippet in fetched)
+    except (NoTranscriptFound, TranscriptsDisabled):
+        transcript = ""
+    store.put_transcript(video["id"], video["title"], transcript)
+    return transcript, False
+
+
+def chunks(text, size=CHUNK_CHARS, limit=MAX_CHUNKS):
+    """Split on whitespace into at most `limit` chunks of about `size` characters."""
+    parts, start = [], 0
+    while start < len(text) and len(parts) < limit:
+        end = min(start + size, len(text))
+        space = text.rfind(" ", start, end)
+        if end < len(text) and space > start:
+            end = space
+        parts.append(text[start:end].strip())
+        start = end
+    return [p for p in parts if p]
+
+
+class VideoResearcher:
+    """Builds the videos section from cached transcripts and per-video summaries.
+
+    summarizer() must return a fresh agent whose run(prompt) gives a RunResponse;
+    version identifies the summary prompt so edits invalidate stored summaries.
+    """
+
+    name = "YouTube Agent"
+
+    def __init__(self, summarizer, version):
+        self.summarizer = summarizer
+        self.version = version
+        self.scheduler_session = None
+
+    def _summarize(self, prompt):
+        agent = self.summarizer()
+        agent.model.scheduler_session = self.scheduler_session
+        response = agent.run(prompt)
+        return response.content or "", response.messages or []
+
+    def summarize_video(self, video, transcript):
+        """Returns (summary, model messages, whether the summary came from the store)."""
+        store = get_store()
+        summary = store.get_summary(video["id"], self.version)
+        if summary is not None:
+            return summary, [], True
+        parts = chunks(transcript)
+        futures = [
+            _chunk_pool.submit(self._summarize, f"Video: {video['title']}\nTranscript part {i} of {len(parts)}:\n\n{part}")
+            for i, part in enumerate(parts, 1)
+        ]
+        results = [f.result() for f in futures]
+        messages = [m for _, msgs in results for m in msgs]
+        summary = results[0][0]
+        if len(results) > 1:
+            partials = "\n\n".join(f"Part {i}: {content}" for i, (content, _) in enumerate(results, 1))
+            summary, msgs = self._summarize(f"Video: {video['title']}\nCombine these partial summaries into one summary of the whole video:\n\n{partials}")
+            messages += msgs
+        store.put_summary(video["id"], self.version, summary)
+        return summary, messages, False
+
+    def _video(self, video):
+        """Returns (video, summary or None, model messages, from store, seconds, error)."""
+        start = time.perf_counter()
+        try:
+            transcript, _ = get_transcript(video)
+            if not transcript:
+                return video, None, [], False, time.perf_counter() - start, None
+            summary, messages, stored = self.summarize_video(video, transcript)
+            return video, summary, messages, stored, time.perf_counter() - start, None
+        except Exception as e:
+            # One blocked or failing video should not cost the whole section
+            return video, None, [], False, time.perf_counter() - start, str(e)
+
+    def run(self, message, stream=False, **kwargs):
+        events = self._run(message)
+        if stream:
+            return events
+        return RunResponse(content="".join(e.content or "" for e in events if e.event == "RunResponse"))
+
+    def _run(self, company):
+        yield RunResponse(event="ToolCallStarted", tools=[{"tool_call_id": "search", "tool_name": "youtube_video_search"}])
+        start = time.perf_counter()
+        videos = find_videos(company)
+        yield RunResponse(event="ToolCallCompleted", tools=[{
+            "tool_call_id": "search", "tool_name": "youtube_video_search",
+            "content": json.dumps(videos), "metrics": {"time": time.perf_counter() - start},
+        }])
+        if not videos:
+            yield RunResponse(content=f"No YouTube videos about {company} were found. NA")
+            yield RunResponse(event="RunCompleted", messages=[])
+            return
+
+        summaries, messages = {}, []
+        with ThreadPoolExecutor(max_workers=len(videos), thread_name_prefix="video") as pool:
+            futures = []
+            for video in videos:
+                yield RunResponse(event="ToolCallStarted", tools=[{"tool_call_id": video["id"], "tool_name": "video_summary"}])
+                futures.append(pool.submit(self._video, video))
+            for future in as_completed(futures):
+                video, summary, msgs, stored, elapsed, error = future.result()
+                summaries[video["id"]] = summary
+                messages += msgs
+                yield RunResponse(event="ToolCallCompleted", tools=[{
+                    "tool_call_id": video["id"], "tool_name": "video_summary", "content": summary or error or "",
+                    "metrics": {"time": elapsed, "cached": stored}, "tool_call_error": bool(error),
+                }])
+
+        lines = [f"## Videos about {company}", ""]
+        for video in videos:
+            details = " · ".join(x for x in (video["publisher"], video["duration"]) if x)
+            lines.append(f"### [{video['title']}]({video_url(video['id'])})")
+            if details:
+                lines.append(f"*{details}*")
+            lines.append("")
+            lines.append(summaries.get(video["id"]) or f"No captions available. {video['description']}".strip())
+            lines.append("")
+        yield RunResponse(content="\n".join(lines))
+        yield RunResponse(event="RunCompleted", messages=messages)